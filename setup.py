@@ -8,6 +8,7 @@ setup(name='django-sphinxql',
       author_email='jorgecarleitao@gmail.com',
       packages=find_packages(),
       install_requires=['Django >= 1.8', 'pymysql'],
+      extras_require={'async': ['aiomysql']},
       url='https://github.com/jorgecarleitao/django-sphinxql',
       license='GPLv2',
       classifiers=[
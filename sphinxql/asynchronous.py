@@ -0,0 +1,144 @@
+"""
+Asynchronous evaluation of querysets. Asynchronous generators and
+comprehensions require Python >= 3.6, so this module is only imported by
+:mod:`sphinxql.query` on it.
+"""
+import django.db.models.query
+
+from .exceptions import NotSupportedError
+
+
+def _sync_to_async(function):
+    """
+    Returns an asynchronous version of ``function`` that runs it in a thread,
+    used for Django operations without asynchronous support.
+    """
+    try:
+        from asgiref.sync import sync_to_async
+    except ImportError:
+        raise NotSupportedError('Django-SphinxQL requires Django >= 3.0 for '
+                                'asynchronous queries.')
+    return sync_to_async(function)
+
+
+class AsyncQuerySetMixin(object):
+    """
+    The asynchronous methods of :class:`~sphinxql.query.QuerySet`.
+    """
+    async def _afetch_raw(self):
+        """
+        Same as `_fetch_raw`, but hits Sphinx asynchronously.
+        """
+        if self._fetch_cache is not None:
+            return self._fetch_cache
+
+        if self._batch is not None:
+            raise NotSupportedError('Batches cannot be evaluated '
+                                    'asynchronously.')
+
+        query = self._get_query()
+        self._fetch_cache = [result async for result in query]
+        if query.meta is not None:
+            self._meta = query.meta
+        return self._fetch_cache
+
+    async def _aparsed_results(self):
+        for instance in self._parse(await self._afetch_raw()):
+            yield instance
+
+    def __aiter__(self):
+        if self.query.limit is None:
+            raise IndexError('Sphinx does not support unbounded iterations '
+                             'over the results.')
+        return self._aparsed_results()
+
+    async def acount(self):
+        """
+        Same as :meth:`count`, but hits Sphinx asynchronously.
+        """
+        if self._batch is not None:
+            raise NotSupportedError('Batches cannot be evaluated '
+                                    'asynchronously.')
+        if self._meta is not None:
+            return self._meta.total_found
+
+        query = self._count_query()
+        return self._count(query, [row async for row in query])
+
+
+class AsyncSearchQuerySetMixin(object):
+    """
+    The asynchronous methods of :class:`~sphinxql.query.SearchQuerySet`. Sphinx
+    is hit asynchronously; Django in a thread, with the same methods as the
+    synchronous evaluation (e.g. `_hydrate`).
+    """
+    async def _asearch_results(self):
+        """
+        Same as `_search_results`, but hits Sphinx asynchronously.
+        """
+        queryset = self._get_search_queryset()
+        results = [index_obj async for index_obj in queryset]
+        self._search_meta = queryset.meta
+        return results
+
+    async def _aannotated_models(self):
+        """
+        Same as `_annotated_models`, but hits Sphinx and Django asynchronously.
+        """
+        if self._result_cache is not None:
+            return self._result_cache
+
+        search_results = await self._asearch_results()
+        self._result_cache = await _sync_to_async(self._hydrate)(
+            search_results)
+        return self._result_cache
+
+    async def _apage(self, start, stop):
+        """
+        Same as `_page`, but hits Sphinx and Django asynchronously.
+        """
+        key, queryset = self._page_queryset(start, stop)
+        if key not in self._page_cache:
+            search_results = [index_obj async for index_obj in queryset]
+            self._search_meta = queryset.meta
+            self._page_cache[key] = await _sync_to_async(self._hydrate)(
+                search_results)
+        return self._page_cache[key]
+
+    def __aiter__(self):
+        if not self.search_mode and \
+                hasattr(django.db.models.query.QuerySet, '__aiter__'):
+            return super(AsyncSearchQuerySetMixin, self).__aiter__()
+        return self._aiterator()
+
+    async def _aiterator(self):
+        if self.search_mode:
+            results = await self._aannotated_models()
+        else:
+            results = await _sync_to_async(list)(self)
+        for obj in results:
+            yield obj
+
+    async def acount(self):
+        if self.search_mode:
+            if self._result_cache is not None or self._from_index:
+                return len(await self._aannotated_models())
+            id_list = [index_obj.id for index_obj in
+                       await self._asearch_results()]
+            return await _sync_to_async(self._get_query(id_list).count)()
+        return await _sync_to_async(self.count)()
+
+    async def aget_page(self, number=1, per_page=20):
+        """
+        Returns the list of results of the page ``number`` (starting at 1)
+        with ``per_page`` results per page. Like slicing, only the results of
+        the page are retrieved when possible (see `_page`).
+        """
+        start = (number - 1) * per_page
+        stop = start + per_page
+        if self.search_mode:
+            if self._is_pageable(slice(start, stop)) and \
+                    not self._is_filtered_by_django():
+                return await self._apage(start, stop)
+            return (await self._aannotated_models())[start:stop]
+        return [obj async for obj in self[start:stop]]
@@ -0,0 +1,100 @@
+"""
+Asynchronous connections to searchd. Asynchronous generators require
+Python >= 3.6, so this module is only imported by asynchronous queries.
+"""
+import asyncio
+import weakref
+
+import MySQLdb
+
+# optional: only required for asynchronous queries.
+try:
+    import aiomysql
+except ImportError:
+    aiomysql = None
+
+from ..exceptions import SphinxError, ImproperlyConfigured
+from .connection import Connection, DEFAULT_FETCH_SIZE, pool_params
+
+
+_async_pools = weakref.WeakKeyDictionary()  # event loop: aiomysql pool
+
+
+async def get_async_pool():
+    """
+    Returns the pool of asynchronous connections to the configured searchd of
+    the running event loop. Requires aiomysql.
+    """
+    if aiomysql is None:
+        raise ImproperlyConfigured('Django-SphinxQL requires aiomysql for '
+                                   'asynchronous queries.')
+    loop = asyncio.get_event_loop()
+    pool = _async_pools.get(loop)
+    if pool is None:
+        host, port = Connection.configure_connection(None, None)
+        new_pool = await aiomysql.create_pool(
+            minsize=0, maxsize=pool_params()['size'],
+            host=host, port=port, charset='utf8',
+            client_flag=MySQLdb.constants.CLIENT.MULTI_STATEMENTS)
+        pool = _async_pools.setdefault(loop, new_pool)
+        if pool is not new_pool:
+            new_pool.close()
+    return pool
+
+
+class AsyncConnection():
+    """
+    The asynchronous equivalent of :class:`Connection`, borrowing connections
+    from the pool of the running event loop (see :func:`get_async_pool`).
+    """
+    @staticmethod
+    async def _acquire(pool):
+        timeout = pool_params()['timeout']
+        try:
+            db = await asyncio.wait_for(pool.acquire(), timeout)
+            try:
+                await db.ping(False)
+            except Exception:
+                # closed connections are dropped by the pool on release.
+                db.close()
+                pool.release(db)
+                db = await asyncio.wait_for(pool.acquire(), timeout)
+        except asyncio.TimeoutError:
+            raise SphinxError('No connection to searchd available '
+                              'after %s seconds.' % timeout)
+        return db
+
+    async def iterator(self, sql, params, fetch_size=DEFAULT_FETCH_SIZE,
+                       unbuffered=False, meta=None):
+        """
+        Same as :meth:`Connection.iterator`, but an asynchronous generator.
+        """
+        pool = await get_async_pool()
+        db = await self._acquire(pool)
+        try:
+            if unbuffered:
+                cursor = await db.cursor(aiomysql.SSCursor)
+            else:
+                cursor = await db.cursor()
+            try:
+                if meta is not None:
+                    sql += '; SHOW META'
+                await cursor.execute(sql, params)
+
+                while True:
+                    rows = await cursor.fetchmany(fetch_size)
+                    if not rows:
+                        break
+                    for row in rows:
+                        yield row
+
+                if meta is not None:
+                    await cursor.nextset()
+                    meta.update(await cursor.fetchall())
+            finally:
+                await cursor.close()
+        except aiomysql.OperationalError:
+            db.close()
+            raise
+        finally:
+            pool.release(db)
@@ -5,35 +5,290 @@ try:
 except ImportError:
     pass
 
+from contextlib import contextmanager
+import copy
+import threading
+
 import MySQLdb
 
+from ..exceptions import SphinxError
+
 
 DEFAULT_LIMIT_COUNT = 100
 
+# number of rows fetched from searchd at a time.
+DEFAULT_FETCH_SIZE = 1000
+
+DEFAULT_POOL_PARAMS = {'size': 10,
+                       'max_idle': 5,
+                       'timeout': 10,
+                       }
+
+
+class ConnectionPool(object):
+    """
+    A thread-safe pool of connections to searchd.
+
+    At most ``size`` connections are open at the same time and at most
+    ``max_idle`` of them are kept open while not in use. Idle connections are
+    pinged before being handed out; dead connections are discarded and
+    replaced by new ones.
+    """
+    def __init__(self, host, port, size=DEFAULT_POOL_PARAMS['size'],
+                 max_idle=DEFAULT_POOL_PARAMS['max_idle'],
+                 timeout=DEFAULT_POOL_PARAMS['timeout']):
+        assert size > 0 and 0 <= max_idle <= size
+        self.host, self.port = host, port
+        self.size = size
+        self.max_idle = max_idle
+        self.timeout = timeout
+
+        self._idle = []
+        self._in_use = 0
+        self._condition = threading.Condition()
+        self._statistics = {'created': 0, 'reused': 0, 'discarded': 0,
+                            'waits': 0}
+
+    def _connect(self):
+        # multiple statements are used to send e.g. `SHOW META` together
+        # with the query.
+        return MySQLdb.connect(
+            host=self.host, port=self.port, charset='utf8',
+            client_flag=MySQLdb.constants.CLIENT.MULTI_STATEMENTS)
+
+    @staticmethod
+    def _is_alive(db):
+        try:
+            db.ping(False)
+        except Exception:
+            return False
+        return True
+
+    @staticmethod
+    def _close(db):
+        try:
+            db.close()
+        except Exception:
+            pass
+
+    def acquire(self):
+        """
+        Returns an open connection, waiting up to ``timeout`` seconds for one
+        to be released if the pool is exhausted.
+        """
+        with self._condition:
+            while not self._idle and self._in_use >= self.size:
+                self._statistics['waits'] += 1
+                if not self._condition.wait(self.timeout):
+                    raise SphinxError('No connection to searchd available '
+                                      'after %s seconds.' % self.timeout)
+            self._in_use += 1
+            db = self._idle.pop() if self._idle else None
+
+        if db is not None and not self._is_alive(db):
+            self._close(db)
+            db = None
+            with self._condition:
+                self._statistics['discarded'] += 1
+
+        if db is None:
+            try:
+                db = self._connect()
+            except Exception:
+                with self._condition:
+                    self._in_use -= 1
+                    self._condition.notify()
+                raise
+            with self._condition:
+                self._statistics['created'] += 1
+        else:
+            with self._condition:
+                self._statistics['reused'] += 1
+        return db
+
+    def release(self, db, discard=False):
+        """
+        Returns ``db`` to the pool. It is closed instead if ``discard`` is
+        ``True`` or if the pool already has ``max_idle`` idle connections.
+        """
+        with self._condition:
+            self._in_use -= 1
+            keep = not discard and len(self._idle) < self.max_idle
+            if keep:
+                self._idle.append(db)
+            else:
+                self._statistics['discarded'] += 1
+            self._condition.notify()
+        if not keep:
+            self._close(db)
+
+    def close(self):
+        """
+        Closes all idle connections.
+        """
+        with self._condition:
+            idle, self._idle = self._idle, []
+        for db in idle:
+            self._close(db)
+
+    def statistics(self):
+        """
+        Returns a dictionary with the current state of the pool and counters of
+        created, reused and discarded connections, and of waits for a free one.
+        """
+        with self._condition:
+            statistics = dict(self._statistics)
+            statistics.update({'size': self.size,
+                               'max_idle': self.max_idle,
+                               'in_use': self._in_use,
+                               'idle': len(self._idle)})
+        return statistics
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def pool_params():
+    """
+    Returns the parameters of pools, ``DEFAULT_POOL_PARAMS`` overridden by
+    ``settings.INDEXES['pool_params']``.
+    """
+    from django.conf import settings
+    params = dict(DEFAULT_POOL_PARAMS)
+    params.update(settings.INDEXES.get('pool_params', {}))
+    return params
+
+
+def get_pool():
+    """
+    Returns the process-wide pool of connections to the configured searchd.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                host, port = Connection.configure_connection(None, None)
+                _pool = ConnectionPool(host, port, **pool_params())
+    return _pool
+
 
 class Connection():
+    """
+    Executes statements in searchd with connections borrowed from a
+    :class:`ConnectionPool`, by default the process-wide one.
+    """
     def __init__(self, host=None, port=None):
-        self.host, self.port = self.configure_connection(host, port)
-        self.db = None
+        self._pool = None
+        if host is not None or port is not None:
+            host, port = self.configure_connection(host, port)
+            self._pool = ConnectionPool(host, port, **pool_params())
+        # the connection reserved by `session`, if any.
+        self._db = None
 
-    def iterator(self, sql, params):
-        # lazy connect to the server to avoid connection without usage.
-        if self.db is None:
-            self.db = MySQLdb.connect(host=self.host, port=self.port, charset='utf8')
-        cursor = self.db.cursor()
+    @property
+    def pool(self):
+        if self._pool is None:
+            return get_pool()
+        return self._pool
 
+    @contextmanager
+    def session(self):
+        """
+        Reserves a connection of the pool and returns a :class:`Connection`
+        that executes all its statements with it, until the context exits.
+        """
+        pool = self.pool
+        session = copy.copy(self)
+        session._db = pool.acquire()
+        session._discard = False
         try:
-            cursor.execute(sql, params)
-        except Exception:
-            cursor.close()
+            yield session
+        except MySQLdb.OperationalError:
+            session._discard = True
             raise
+        finally:
+            db, session._db = session._db, None
+            pool.release(db, session._discard)
 
-        cursor.execute(sql, params)
+    def _acquire(self):
+        if self._db is not None:
+            return self._db
+        return self.pool.acquire()
 
-        for x in range(cursor.rowcount):
-            yield cursor.fetchone()
+    def _release(self, db, discard):
+        if self._db is None:
+            self.pool.release(db, discard)
+        elif discard:
+            # released by `session`.
+            self._discard = True
 
-        cursor.close()
+    def iterator(self, sql, params, fetch_size=DEFAULT_FETCH_SIZE,
+                 unbuffered=False, meta=None):
+        """
+        Executes ``sql`` once and yields its rows, fetched in batches of
+        ``fetch_size``. If ``unbuffered`` is ``True``, rows are streamed from
+        searchd (server-side cursor) instead of being buffered in the client.
+
+        If ``meta`` is not ``None``, ``SHOW META`` is sent together with
+        ``sql`` and, once all rows were yielded, ``meta.update`` is called
+        with its rows.
+        """
+        db = self._acquire()
+        discard = False
+        cursor = None
+        try:
+            if unbuffered:
+                cursor = db.cursor(MySQLdb.cursors.SSCursor)
+            else:
+                cursor = db.cursor()
+            if meta is not None:
+                sql += '; SHOW META'
+            cursor.execute(sql, params)
+
+            while True:
+                rows = cursor.fetchmany(fetch_size)
+                if not rows:
+                    break
+                yield from rows
+
+            if meta is not None:
+                cursor.nextset()
+                meta.update(cursor.fetchall())
+        except MySQLdb.OperationalError:
+            discard = True
+            raise
+        finally:
+            if cursor is not None:
+                cursor.close()
+            self._release(db, discard)
+
+    def batch(self, statements):
+        """
+        Executes ``statements``, a list of ``(sql, params)``, in a single
+        request and returns a list with the rows of each statement.
+        """
+        sql = '; '.join(statement_sql for statement_sql, _ in statements)
+        params = [param for _, statement_params in statements
+                  for param in statement_params]
+
+        db = self._acquire()
+        discard = False
+        try:
+            cursor = db.cursor()
+            try:
+                cursor.execute(sql, params)
+                results = [list(cursor.fetchall())]
+                while cursor.nextset():
+                    results.append(list(cursor.fetchall()))
+            finally:
+                cursor.close()
+        except MySQLdb.OperationalError:
+            discard = True
+            raise
+        finally:
+            self._release(db, discard)
+        return results
 
     @staticmethod
     def configure_connection(host, port):
@@ -1,5 +1,7 @@
 import datetime
 import calendar
+from copy import copy
+from decimal import Decimal
 
 from django.conf import settings
 from django.utils.timezone import get_current_timezone
@@ -41,19 +43,33 @@ class CompilableSQL(object):
         """
         raise NotImplementedError('%s' % self.__class__)
 
+    def fingerprint(self):
+        """
+        Returns a hashable representation of the structure of the sql: two
+        expressions with the same fingerprint have the same ``as_sql()``.
+        """
+        raise NotImplementedError('%s' % self.__class__)
+
     def sql(self):
         """
         Returns the sql expression with substituting parameters
         """
-        return self.as_sql() % self.get_params()
+        return self.as_sql() % tuple(self.get_params())
 
-    def resolve_columns(self, index):
+    def resolve_columns(self, index, aliases=None):
         return self
 
+    def __copy__(self):
+        # faster than the default `copy`, used on every clone of a query.
+        clone = self.__class__.__new__(self.__class__)
+        clone.__dict__.update(self.__dict__)
+        return clone
+
 
 class SQLExpression(CompilableSQL):
     """
-    A general sql expression.
+    A general sql expression. Expressions are never modified after being
+    constructed, so that queries can share them.
     """
     def __init__(self, value):
         self._value = value
@@ -62,6 +78,9 @@ class SQLExpression(CompilableSQL):
     def value(self):
         return self._value
 
+    def fingerprint(self):
+        return self.__class__, self._value
+
     def type(self):
         """
         The output type of the expression (e.g. `Bool`).
@@ -152,6 +171,9 @@ class All(CompilableSQL):
     def get_params(self):
         return []
 
+    def fingerprint(self):
+        return self.__class__,
+
 
 #### Functions
 
@@ -170,7 +192,9 @@ class Function(SQLExpression):
            len(values) != self._arguments_num:
             raise IndexError('len of argument of "%s" must be %d' %
                              (self.__class__.__name__, self._arguments_num))
-        super(Function, self).__init__(values)
+        super(Function, self).__init__(tuple(values))
+        # computed on first use; expressions are never modified.
+        self._fingerprint = None
 
     def type(self):
         """
@@ -194,9 +218,25 @@ class Function(SQLExpression):
             params += value.get_params()
         return params
 
-    def resolve_columns(self, index):
-        self._value = [value.resolve_columns(index) for value in self._value]
-        return super(Function, self).resolve_columns(index)
+    def fingerprint(self):
+        if self._fingerprint is None:
+            self._fingerprint = (self.__class__,) + tuple(
+                value.fingerprint() for value in self._value)
+        return self._fingerprint
+
+    def resolve_columns(self, index, aliases=None):
+        """
+        Returns the function with its arguments resolved; a new function if
+        any argument changed.
+        """
+        values = tuple(value.resolve_columns(index, aliases)
+                       for value in self._value)
+        if all(new is old for new, old in zip(values, self._value)):
+            return self
+        clone = copy(self)
+        clone._value = values
+        clone._fingerprint = None
+        return clone
 
 
 class UnitaryFunction(Function):
@@ -233,9 +273,63 @@ class Match(UnitaryFunction):
         super(UnitaryFunction, self).__init__([String(argument)])
 
 
-class Count(UnitaryFunction):
+#### Aggregate functions
+
+class Aggregate(UnitaryFunction):
+    """
+    A function over the values of all documents (of a group, if grouped).
+    """
+
+
+class Count(Aggregate):
     _function = 'COUNT'
 
+    def type(self):
+        return Integer
+
+
+class CountDistinct(Count):
+    """
+    Sphinx only supports one ``COUNT(DISTINCT)`` per query.
+    """
+    def as_sql(self):
+        return 'COUNT(DISTINCT %s)' % self._value[0].as_sql()
+
+
+class Sum(Aggregate):
+    _function = 'SUM'
+
+
+class Avg(Aggregate):
+    _function = 'AVG'
+
+    def type(self):
+        return Float
+
+
+class Min(Aggregate):
+    _function = 'MIN'
+
+
+class Max(Aggregate):
+    _function = 'MAX'
+
+
+class GroupBy(Function):
+    """
+    The key of the group of a grouped query, ``GROUPBY()``, whose type is the
+    type of the grouped column.
+    """
+    _function = 'GROUPBY'
+    _arguments_num = 0
+
+    def __init__(self, type=None):
+        super(GroupBy, self).__init__([])
+        self._type = type or Integer
+
+    def type(self):
+        return self._type
+
 
 class Power(Function):
     _function = 'POW'
@@ -383,7 +477,8 @@ class GreaterEqualThan(BooleanOperation):
 
 class Value(SQLExpression):
     """
-    Represents a constant value.
+    Represents a constant value. Values are always parameters of the sql, so
+    that the sql of a query does not depend on them.
     """
     _input_python_types = ()
     _python_type = None
@@ -399,58 +494,66 @@ class Value(SQLExpression):
     def type(self):
         return type(self)
 
+    def as_sql(self):
+        return '%s'
+
     def get_params(self):
-        return []
+        return [self._value]
+
+    def fingerprint(self):
+        # the value is a parameter, not part of the sql.
+        return self.__class__,
 
     @staticmethod
     def to_python(db_value):
         return db_value
 
 
+def converters(types):
+    """
+    Returns the ``(position, to_python)`` of each of ``types`` that changes the
+    values returned by Sphinx.
+    """
+    return tuple((position, type.to_python)
+                 for position, type in enumerate(types)
+                 if type.to_python is not Value.to_python)
+
+
 class Integer(Value):
     _input_python_types = (int, float, bool)
     _python_type = int
 
-    def as_sql(self):
-        return '%d' % self._value
-
 
 class Float(Value):
     _input_python_types = (int, float, bool)
     _python_type = float
 
-    def as_sql(self):
-        return '%f' % self._value
+    def get_params(self):
+        # a decimal is escaped in fixed-point notation, which Sphinx parses,
+        # while a float may be escaped in scientific notation (e.g. `2e0`).
+        return [Decimal('%f' % self._value)]
 
 
 class Bool(Value):
     _input_python_types = (int, float, bool)
     _python_type = bool
 
-    def as_sql(self):
-        if self._value:
-            return 'TRUE'
-        else:
-            return 'FALSE'
+    def get_params(self):
+        return [int(self._value)]
 
 
 class String(Value):
     _input_python_types = (int, float, bool, str)
     _python_type = str
 
-    def as_sql(self):
-        return '%s'
-
-    def get_params(self):
-        return [self._value]
-
 
 class Date(Value):
     _input_python_types = (datetime.date,)
     _python_type = datetime.date
 
-    def as_sql(self):
-        return calendar.timegm(self._value.timetuple())
+    def get_params(self):
+        # Sphinx stores dates as timestamps
+        return [calendar.timegm(self._value.timetuple())]
 
     @staticmethod
     def to_python(db_value):
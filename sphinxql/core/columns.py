@@ -47,3 +47,21 @@ class WeightColumn(Column):
 
     def as_sql(self):
         return '%s' % self._value
+
+
+class GroupCountColumn(Column):
+    """
+    Column representing the number of documents of each group of a grouped
+    query (``@count``).
+    """
+    def __init__(self):
+        super(GroupCountColumn, self).__init__(Integer, 'group_count')
+
+
+class GroupKeyColumn(Column):
+    """
+    Column representing the key of each group of a grouped query
+    (``@groupby``).
+    """
+    def __init__(self):
+        super(GroupKeyColumn, self).__init__(Integer, 'group_key')
@@ -1,14 +1,86 @@
 from collections import OrderedDict
-from copy import deepcopy
+from copy import copy
+import re
+import threading
 
-from ..configuration.connection import Connection, DEFAULT_LIMIT_COUNT
+from ..configuration.connection import Connection, DEFAULT_LIMIT_COUNT, \
+    DEFAULT_FETCH_SIZE
 from ..exceptions import NotSupportedError
-from .base import CompilableSQL, All
+from .base import CompilableSQL, SQLExpression, All
 from .columns import IdColumn, Column
 
 # Sphinx sets a max of 5 columns in order by.
 MAX_ORDER_BY_ALLOWED = 5
 
+# number of compiled sql kept by the cache of compiled sql.
+DEFAULT_SQL_CACHE_SIZE = 256
+
+
+class SQLCache(object):
+    """
+    A thread-safe LRU cache of compiled sql, keyed by fingerprints of queries
+    (see ``CompilableSQL.fingerprint``), that counts its hits and misses.
+    """
+    def __init__(self, size=DEFAULT_SQL_CACHE_SIZE):
+        self.size = size
+        self._sqls = OrderedDict()  # fingerprint: sql
+        self._lock = threading.Lock()
+        self._statistics = {'hits': 0, 'misses': 0}
+
+    def get(self, fingerprint, compile):
+        """
+        Returns the sql of ``fingerprint``, calling ``compile`` to compile it
+        if it is not cached.
+        """
+        with self._lock:
+            sql = self._sqls.get(fingerprint)
+            if sql is not None:
+                self._sqls.move_to_end(fingerprint)
+                self._statistics['hits'] += 1
+                return sql
+            self._statistics['misses'] += 1
+
+        sql = compile()
+        with self._lock:
+            self._sqls[fingerprint] = sql
+            while len(self._sqls) > self.size:
+                self._sqls.popitem(last=False)
+        return sql
+
+    def clear(self):
+        with self._lock:
+            self._sqls.clear()
+
+    def statistics(self):
+        """
+        Returns a dictionary with the number of ``hits`` and ``misses``, the
+        ``size`` of the cache and the number of sql it currently ``cached``.
+        """
+        with self._lock:
+            statistics = dict(self._statistics)
+            statistics.update({'size': self.size, 'cached': len(self._sqls)})
+        return statistics
+
+
+_sql_cache = None
+_sql_cache_lock = threading.Lock()
+
+
+def get_sql_cache():
+    """
+    Returns the process-wide cache of compiled sql, with the size
+    ``settings.INDEXES['sql_cache_size']`` (``DEFAULT_SQL_CACHE_SIZE`` by
+    default).
+    """
+    global _sql_cache
+    if _sql_cache is None:
+        from django.conf import settings
+        with _sql_cache_lock:
+            if _sql_cache is None:
+                _sql_cache = SQLCache(settings.INDEXES.get(
+                    'sql_cache_size', DEFAULT_SQL_CACHE_SIZE))
+    return _sql_cache
+
 
 class Query(CompilableSQL):
     """
@@ -19,25 +91,54 @@ class Query(CompilableSQL):
             'select': SelectStatement(),
             'from': FromStatement(),
             'where': None,
+            'group_by': GroupByStatement(),
+            'within_group_order_by': OrderByStatement('_group_order_'),
             'order_by': OrderByStatement(),
-            'limit': None   # `None` or (offset, count)
+            'limit': None,   # `None` or (offset, count)
+            'option': OptionStatement(),
         }
         self.low_mark, self.high_mark = 0, None
 
+        # how results are fetched from searchd, see `Connection.iterator`.
+        self.fetch_size = DEFAULT_FETCH_SIZE
+        self.unbuffered = False
+
+        # whether to retrieve `SHOW META` with the results; when `True`,
+        # `meta` is populated after the results are fetched.
+        self.with_meta = False
+        self.meta = None
+
         self._connection = connection
         if connection is None:
             self._connection = Connection()
 
     def __iter__(self):
         """
-        If limits are defined, returns an iterator over all results.
-        else, iterates over all results using LIMIT in chunks of
-        DEFAULT_LIMIT_COUNT.
+        Returns an iterator over the results, fetched from searchd in batches
+        of `fetch_size`. Without `limit`, Sphinx returns its default number of
+        results (see `QuerySet.iterator` to iterate over all).
         """
-        return self._connection.iterator(self.as_sql(), self.get_params())
+        if self.with_meta:
+            self.meta = QueryMeta()
+        return self._connection.iterator(self.as_sql(), self.get_params(),
+                                         self.fetch_size, self.unbuffered,
+                                         self.meta)
+
+    def __aiter__(self):
+        """
+        Same as `__iter__`, but iterates asynchronously (see
+        `AsyncConnection`).
+        """
+        from ..configuration.asynchronous import AsyncConnection
+        if self.with_meta:
+            self.meta = QueryMeta()
+        return AsyncConnection().iterator(self.as_sql(), self.get_params(),
+                                          self.fetch_size, self.unbuffered,
+                                          self.meta)
 
     def __str__(self):
-        return self.as_sql() % tuple("\"%s\"" % x for x in self.get_params())
+        return self.as_sql() % tuple("\"%s\"" % x if isinstance(x, str) else x
+                                     for x in self.get_params())
 
     def __len__(self):
         return len(list(iter(self)))
@@ -66,10 +167,22 @@ class Query(CompilableSQL):
     def where(self, value):
         self._statements['where'] = value
 
+    @property
+    def group_by(self):
+        return self._statements['group_by']
+
+    @property
+    def within_group_order_by(self):
+        return self._statements['within_group_order_by']
+
     @property
     def order_by(self):
         return self._statements['order_by']
 
+    @property
+    def option(self):
+        return self._statements['option']
+
     @property
     def limit(self):
         return self._statements['limit']
@@ -82,6 +195,24 @@ class Query(CompilableSQL):
         self._statements['limit'] = value
 
     def as_sql(self):
+        """
+        Returns the sql of the query, compiled once per fingerprint.
+        """
+        return get_sql_cache().get(self.fingerprint(), self._compile)
+
+    def fingerprint(self):
+        statements = self._statements
+        where = statements['where']
+        return (statements['select'].fingerprint(),
+                statements['from'].fingerprint(),
+                where.fingerprint() if where is not None else None,
+                statements['group_by'].fingerprint(),
+                statements['within_group_order_by'].fingerprint(),
+                statements['order_by'].fingerprint(),
+                statements['limit'] is not None,
+                statements['option'].fingerprint())
+
+    def _compile(self):
         statements = self._statements.copy()
         if not statements['select']:
             statements['select'] = All()
@@ -90,35 +221,96 @@ class Query(CompilableSQL):
 
         if statements['where']:
             query += ' WHERE {where}'
+        if statements['group_by']:
+            if statements['group_by'].per_group is not None:
+                query += ' GROUP %s BY {group_by}'
+            else:
+                query += ' GROUP BY {group_by}'
+        if statements['within_group_order_by']:
+            query += ' WITHIN GROUP ORDER BY {within_group_order_by}'
         if statements['order_by']:
             query += ' ORDER BY {order_by}'
         if statements['limit']:
-            query += ' LIMIT %d, %d' % statements['limit']
+            query += ' LIMIT %s, %s'
+        if statements['option']:
+            query += ' OPTION {option}'
 
         cleaned_statements = {key: value.as_sql() for key, value in
                               statements.items() if value and key != 'limit'}
+        # expressions of the ordering are selected, see `OrderByStatement`.
+        for clause in ('within_group_order_by', 'order_by'):
+            for expression, alias in statements[clause].aliased():
+                cleaned_statements['select'] += ', %s AS %s' % (
+                    expression.as_sql(), alias)
 
         return query.format(**cleaned_statements)
 
     def get_params(self):
         params = []
-        for clause in ('select', 'from', 'where'):
+        for clause in ('select', 'within_group_order_by', 'order_by', 'from',
+                       'where', 'group_by'):
             if self._statements[clause]:
                 params += self._statements[clause].get_params()
+        if self._statements['limit']:
+            params += self._statements['limit']
         return params
 
     def clone(self):
-        clone = Query()
-        # deep because we want new statements
-        clone._statements = deepcopy(self._statements)
+        clone = copy(self)
+        clone.meta = None
+        # statements are copied on write and expressions are never mutated
+        # after construction: shallow copies of statements share them.
+        clone._statements = self._statements.copy()
+        for clause in ('select', 'from', 'group_by', 'within_group_order_by',
+                       'order_by', 'option'):
+            clone._statements[clause] = copy(self._statements[clause])
         return clone
 
 
-class SelectStatement(CompilableSQL):
+class QueryMeta(object):
+    """
+    The statistics of a query, as returned by Sphinx ``SHOW META``.
+
+    ``total_found`` is the number of matches of the query (not limited by
+    ``LIMIT`` nor ``max_matches``), ``time`` the time the query took (in
+    seconds) and ``keywords`` a list of ``(keyword, docs, hits)`` with the
+    statistics of each keyword of the full-text search.
+    """
+    def __init__(self):
+        self.total = None
+        self.total_found = None
+        self.time = None
+        self.keywords = []
+        self.values = OrderedDict()  # variable name: value, as returned
+
+    def update(self, rows):
+        keywords = {}
+        for name, value in rows:
+            self.values[name] = value
+            if name in ('total', 'total_found'):
+                setattr(self, name, int(value))
+            elif name == 'time':
+                self.time = float(value)
+            elif name.endswith(']'):
+                # e.g. `keyword[0]`, `docs[0]`, `hits[0]`
+                variable, position = name[:-1].split('[')
+                keywords.setdefault(int(position), {})[variable] = value
+
+        self.keywords = [(keyword['keyword'],
+                          int(keyword.get('docs', 0)),
+                          int(keyword.get('hits', 0)))
+                         for _, keyword in sorted(keywords.items())]
 
+
+class SelectStatement(CompilableSQL):
+    """
+    Used to create select statements. Like the other statements, it is copied
+    on write: its tuples are replaced, never modified, so that copies of it
+    share them.
+    """
     def __init__(self):
-        self._expressions = []
-        self._alias = []  # list of alias (string) or None if no alias for expression
+        self._expressions = ()
+        self._alias = ()  # alias (string) or None if no alias for expression
 
     def __len__(self):
         """
@@ -126,19 +318,26 @@ class SelectStatement(CompilableSQL):
         """
         return len(self._expressions)
 
+    def __iter__(self):
+        """
+        Iterates over ``(expression, alias)`` of each selected expression.
+        """
+        return zip(self._expressions, self._alias)
+
     def clear(self):
-        self._expressions.clear()
-        self._alias.clear()
+        self._expressions = ()
+        self._alias = ()
 
     def append(self, expression, alias=None):
         assert (alias is None) or alias not in self._alias
 
         # first column must be ID
-        if not self._expressions:
-            self._expressions.append(IdColumn())
-            self._alias.append(None)
-        self._expressions.append(expression)
-        self._alias.append(alias)
+        if not self._expressions and \
+                not (isinstance(expression, IdColumn) and alias is None):
+            self._expressions = (IdColumn(),)
+            self._alias = (None,)
+        self._expressions += (expression,)
+        self._alias += (alias,)
 
     def as_sql(self):
         sql = ''
@@ -162,6 +361,10 @@ class SelectStatement(CompilableSQL):
             params += x.get_params()
         return params
 
+    def fingerprint(self):
+        return tuple(zip((expression.fingerprint()
+                          for expression in self._expressions), self._alias))
+
 
 class FromStatement(CompilableSQL):
 
@@ -170,7 +373,9 @@ class FromStatement(CompilableSQL):
 
     def append(self, index):
         assert index.build_name() not in self._indexes
-        self._indexes[index.build_name()] = index
+        indexes = self._indexes.copy()
+        indexes[index.build_name()] = index
+        self._indexes = indexes
 
     def as_sql(self):
         assert self._indexes
@@ -191,17 +396,64 @@ class FromStatement(CompilableSQL):
     def get_params(self):
         return []
 
+    def fingerprint(self):
+        return tuple(self._indexes)
+
+
+class GroupByStatement(CompilableSQL):
+    """
+    Used to create group by statements. If ``per_group`` is not ``None``,
+    the query returns up to ``per_group`` results per group (``GROUP N BY``).
+    """
+    def __init__(self):
+        self._columns = ()
+        self.per_group = None
+
+    def __len__(self):
+        """
+        For the existence of query
+        """
+        return len(self._columns)
+
+    def __iter__(self):
+        return iter(self._columns)
+
+    def append(self, column):
+        assert isinstance(column, Column)
+        if column.name not in (other.name for other in self._columns):
+            self._columns += (column,)
+
+    def as_sql(self):
+        assert self._columns
+        return ', '.join(column.as_sql() for column in self._columns)
+
+    def get_params(self):
+        if self.per_group is not None:
+            return [self.per_group]
+        return []
+
+    def fingerprint(self):
+        return (self.per_group is not None,) + \
+            tuple(column.fingerprint() for column in self._columns)
+
+    def clear(self):
+        self._columns = ()
+        self.per_group = None
+
 
 class OrderByStatement(CompilableSQL):
     """
-    Used to create order by statements
+    Used to create order by statements. Sphinx only orders by columns:
+    expressions that are not columns are selected under the alias
+    ``<alias_prefix><position>`` (see ``aliased``) and ordered by it.
     """
     _DIRECTION = {True: 'ASC', False: 'DESC'}
 
-    def __init__(self):
-        self._columns = []  # columns to as_sql()
-        self._directions = []  # 'ASC' or 'DESC'
-        self._columns_names = []  # columns names already inside
+    def __init__(self, alias_prefix='_order_'):
+        self._columns = ()  # expressions to as_sql()
+        self._directions = ()  # 'ASC' or 'DESC'
+        self._columns_names = ()  # columns names (or None) already inside
+        self._alias_prefix = alias_prefix
 
     def __len__(self):
         """
@@ -209,6 +461,22 @@ class OrderByStatement(CompilableSQL):
         """
         return len(self._columns)
 
+    def __iter__(self):
+        """
+        Iterates over ``(column, ascending)`` of each expression.
+        """
+        for column, direction in zip(self._columns, self._directions):
+            yield column, direction == 'ASC'
+
+    def aliased(self):
+        """
+        Returns the ``(expression, alias)`` of the expressions that are not
+        columns, which must be selected.
+        """
+        return [(column, self._alias_prefix + str(position))
+                for position, column in enumerate(self._columns)
+                if not isinstance(column, Column)]
+
     def as_sql(self):
         assert self._columns
         sql = ''
@@ -221,29 +489,140 @@ class OrderByStatement(CompilableSQL):
             else:
                 separator = ', '
 
-            sql += separator + '%s %s' % (column.as_sql(), self._directions[pos])
+            if isinstance(column, Column):
+                column_sql = column.as_sql()
+            else:
+                column_sql = self._alias_prefix + str(pos)
+            sql += separator + '%s %s' % (column_sql, self._directions[pos])
 
         return sql
 
+    def get_params(self):
+        """
+        Returns the parameters of the expressions of ``aliased``.
+        """
+        params = []
+        for expression, _ in self.aliased():
+            params += expression.get_params()
+        return params
+
+    def fingerprint(self):
+        return tuple(zip((column.fingerprint() for column in self._columns),
+                         self._directions))
+
     def append(self, column, ascending=True):
-        assert isinstance(column, Column)
+        assert isinstance(column, SQLExpression)
         assert isinstance(ascending, bool)
-        if len(self._columns) == MAX_ORDER_BY_ALLOWED:
-            raise NotSupportedError("Sphinx only supports up to %s expressions "
-                                    "in order by" % MAX_ORDER_BY_ALLOWED)
 
         direction = self._DIRECTION[ascending]
-
-        if column.name in self._columns_names:
-            index = self._columns_names.index(column.name)
-            self._columns[index] = column
-            self._directions[index] = direction
+        name = column.name if isinstance(column, Column) else None
+
+        if name is not None and name in self._columns_names:
+            index = self._columns_names.index(name)
+            self._columns = self._columns[:index] + (column,) + \
+                self._columns[index + 1:]
+            self._directions = self._directions[:index] + (direction,) + \
+                self._directions[index + 1:]
         else:
-            self._columns_names.append(column.name)
-            self._columns.append(column)
-            self._directions.append(direction)
+            if len(self._columns) == MAX_ORDER_BY_ALLOWED:
+                raise NotSupportedError("Sphinx only supports up to %s "
+                                        "expressions in order by" %
+                                        MAX_ORDER_BY_ALLOWED)
+            self._columns_names += (name,)
+            self._columns += (column,)
+            self._directions += (direction,)
+
+    def clear(self):
+        self._columns = ()
+        self._directions = ()
+        self._columns_names = ()
+
+
+IDENTIFIER_REGEX = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+def _format_integer(name, value, minimum):
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise TypeError('Option "%s" must be an integer.' % name)
+    if value < minimum:
+        raise ValueError('Option "%s" must be at least %d.' % (name, minimum))
+    return '%d' % value
+
+
+def _format_ranker(name, value):
+    if value not in OptionStatement.RANKERS:
+        raise ValueError('Option "%s" must be one of %s.' %
+                         (name, ', '.join(OptionStatement.RANKERS)))
+    return value
+
+
+def _format_weights(name, value):
+    if not isinstance(value, dict) or not value:
+        raise TypeError('Option "%s" must be a non-empty dictionary.' % name)
+    weights = []
+    for field_name in value:
+        if not isinstance(field_name, str) or \
+                not IDENTIFIER_REGEX.match(field_name):
+            raise ValueError('Invalid field name "%s" in option "%s".' %
+                             (field_name, name))
+        weights.append('%s=%s' % (field_name,
+                                  _format_integer(name, value[field_name], 0)))
+    return '(%s)' % ', '.join(weights)
+
+
+class OptionStatement(CompilableSQL):
+    """
+    Used to create option statements
+    """
+    RANKERS = ('proximity_bm25', 'bm25', 'none', 'wordcount', 'proximity',
+               'matchany', 'fieldmask', 'sph04')
+
+    # option name: function that validates and formats its value.
+    _OPTIONS = {
+        'ranker': _format_ranker,
+        'max_matches': lambda name, value: _format_integer(name, value, 1),
+        'cutoff': lambda name, value: _format_integer(name, value, 0),
+        'max_query_time': lambda name, value: _format_integer(name, value, 0),
+        'field_weights': _format_weights,
+    }
+
+    def __init__(self):
+        self._options = OrderedDict()  # name: formatted value
+
+    def __len__(self):
+        """
+        For the existence of query
+        """
+        return len(self._options)
+
+    def append(self, name, value):
+        """
+        Sets the option ``name`` to ``value``, overriding any previous value.
+        """
+        if name not in self._OPTIONS:
+            raise NotSupportedError('Option "%s" is not supported. Supported '
+                                    'options are %s.' %
+                                    (name, ', '.join(sorted(self._OPTIONS))))
+        options = self._options.copy()
+        options[name] = self._OPTIONS[name](name, value)
+        self._options = options
+
+    def get(self, name, default=None):
+        """
+        Returns the formatted value of the option ``name``, or ``default`` if
+        it is not set.
+        """
+        return self._options.get(name, default)
+
+    def as_sql(self):
+        assert self._options
+        return ', '.join('%s=%s' % option for option in self._options.items())
+
+    def get_params(self):
+        return []
+
+    def fingerprint(self):
+        return tuple(self._options.items())
 
     def clear(self):
-        self._columns.clear()
-        self._directions.clear()
-        self._columns_names.clear()
+        self._options = OrderedDict()
@@ -1,5 +1,6 @@
 from collections import OrderedDict
 from .configuration import indexes_configurator
+from .core.base import converters
 from .exceptions import ImproperlyConfigured
 from .fields import Field
 from .query import SearchQuerySet
@@ -27,10 +28,19 @@ class MetaIndex(type):
                                        'is not a Django model'.format(index_name=name,
                                                                       model=meta.model))
 
+        for option in ('hydrate_select_related', 'hydrate_prefetch_related'):
+            if isinstance(getattr(meta, option, ()), str):
+                raise ImproperlyConfigured('{index_name}.Meta.{option} must be '
+                                           'a tuple of relations'.format(
+                                               index_name=name, option=option))
+
         # create new class
         new_class = super(MetaIndex, mcs).__new__(mcs, name, bases, dict(attrs))
         meta = new_class.Meta
 
+        # decoders of rows, see `get_decoder`.
+        new_class._decoders = {}
+
         # populate Meta with fields
         meta.fields = []
         for field_name in attrs:
@@ -65,6 +75,37 @@ class MetaIndex(type):
 
         return new_class
 
+    def get_decoder(cls, columns):
+        """
+        Returns a function that converts a row with the values of ``columns``,
+        a tuple of ``(name, type)``, into an instance of the index. Decoders
+        are built once per index and columns.
+        """
+        try:
+            return cls._decoders[columns]
+        except KeyError:
+            pass
+
+        names = tuple(name for name, _ in columns)
+        conversions = converters(type for _, type in columns)
+
+        if conversions:
+            def decode(row):
+                values = list(row)
+                for position, to_python in conversions:
+                    values[position] = to_python(values[position])
+                instance = cls()
+                instance.__dict__.update(zip(names, values))
+                return instance
+        else:
+            def decode(row):
+                instance = cls()
+                instance.__dict__.update(zip(names, row))
+                return instance
+
+        cls._decoders[columns] = decode
+        return decode
+
 
 class Index(metaclass=MetaIndex):
     """
@@ -1,16 +1,95 @@
+import base64
 from collections import OrderedDict
+from copy import copy
+import datetime
+import json
+import math
+import sys
+import threading
 
 import django.db.models.query
+from django.db import connections
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.utils import timezone
+try:
+    from django.core.exceptions import EmptyResultSet
+except ImportError:  # Django < 1.11
+    from django.db.models.sql.datastructures import EmptyResultSet
 
-from .core.query import Query
+from .configuration.connection import DEFAULT_FETCH_SIZE
+from .core.query import Query, QueryMeta
 from .core import base
 from .core.lookups import LOOKUP_SEPARATOR, parse_lookup
 from sphinxql.exceptions import NotSupportedError
-from .types import Bool
-from .sql import Match, And, Neg, C, Column, All, Count
+from .types import Bool, Integer, Date, DateTime
+from .sql import Match, And, Neg, C, Column, IdColumn, WeightColumn, All, \
+    Count, CountDistinct, GroupBy, GroupCountColumn, GroupKeyColumn
 
+if sys.version_info >= (3, 6):
+    from .asynchronous import AsyncQuerySetMixin, AsyncSearchQuerySetMixin
+else:
+    # asynchronous generators and comprehensions require Python >= 3.6.
+    class AsyncQuerySetMixin(object):
+        pass
 
-class QuerySet(object):
+    class AsyncSearchQuerySetMixin(object):
+        pass
+
+# types of the columns keyset pagination can order by: Sphinx returns their
+# values as integers, which are compared exactly.
+KEYSET_TYPES = (Integer, Bool, Date, DateTime)
+
+# Django lookups translated to Sphinx lookups by `SearchQuerySet.filter`.
+DJANGO_LOOKUPS = {'exact': 'eq', 'gt': 'gt', 'gte': 'gte', 'lt': 'lt',
+                  'lte': 'lte', 'in': 'in', 'range': 'range'}
+
+# number of values of each facet, like Sphinx `FACET`.
+DEFAULT_FACET_LIMIT = 20
+
+# Sphinx default of `max_matches`: results beyond it require the option.
+DEFAULT_MAX_MATCHES = 1000
+
+# adaptive fetching (see `SearchQuerySet.search_adaptive`): the maximum number
+# of results fetched from Sphinx, the size of the first window when the
+# survival ratio of the query is unknown and the growth of the windows.
+DEFAULT_ADAPTIVE_BUDGET = 10000
+ADAPTIVE_FIRST_WINDOW = 100
+ADAPTIVE_GROWTH = 4
+
+# number of query shapes whose survival ratio is kept.
+SURVIVAL_RATIOS_SIZE = 256
+
+# number of ids of each Django query of hydration in backends without arrays.
+DEFAULT_HYDRATION_CHUNK_SIZE = 500
+
+
+def _encode_cursor(ordering, values):
+    """
+    Returns the opaque token of the position ``values`` of a result in
+    ``ordering`` (a list of column names, prefixed by ``-`` if descending).
+    """
+    data = json.dumps({'order': ordering, 'after': list(values)},
+                      separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode('utf8')).decode('ascii')
+
+
+def _decode_cursor(cursor):
+    """
+    Returns the ``{'order': ..., 'after': ...}`` encoded in ``cursor``.
+    """
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii'))
+                          .decode('utf8'))
+        valid = len(data['order']) == len(data['after']) and \
+            all(isinstance(value, int) for value in data['after'])
+    except (ValueError, TypeError, KeyError, AttributeError):
+        valid = False
+    if not valid:
+        raise ValueError('Invalid cursor "%s".' % cursor)
+    return data
+
+
+class QuerySet(AsyncQuerySetMixin):
 
     def __init__(self, index):
         self._index = index
@@ -23,6 +102,22 @@ class QuerySet(object):
 
         self._result_cache = None
         self._fetch_cache = None
+        self._meta = None
+        # the `Batch` this queryset is evaluated with, if any.
+        self._batch = None
+
+        # keyset pagination (see `after`): whether it is used and the decoded
+        # cursor of the previous page (`None` on the first page).
+        self._keyset = False
+        self._cursor = None
+
+        # results as dictionaries or tuples instead of index instances (see
+        # `values`): `None` or (kind, names, positions of names in rows).
+        self._values = None
+
+        # expressions selected by `annotate` (and `group_by`): alias:
+        # expression. Replaced, never modified, so that clones share it.
+        self._annotations = OrderedDict()
 
         self._set_default_fields(self.query)
 
@@ -33,9 +128,26 @@ class QuerySet(object):
         if self._fetch_cache is not None:
             return self._fetch_cache
 
-        self._fetch_cache = list(self._get_query())
+        if self._batch is not None:
+            self._batch.execute()
+            return self._fetch_cache
+
+        query = self._get_query()
+        # `list(query)` would hit Sphinx twice: it calls `Query.__len__`.
+        self._fetch_cache = list(iter(query))
+        if query.meta is not None:
+            self._meta = query.meta
         return self._fetch_cache
 
+    @property
+    def meta(self):
+        """
+        The :class:`~sphinxql.core.query.QueryMeta` of the query of this
+        queryset, or ``None`` if it was not evaluated with meta (see
+        :meth:`with_meta`).
+        """
+        return self._meta
+
     def _get_query(self):
         """
         Returns a copy of the query exactly prior to hit db.
@@ -43,72 +155,436 @@ class QuerySet(object):
         clone = self.query.clone()
         if self._match:
             clone.where = self._add_condition(clone.where, Match(self._match))
+        if self._keyset:
+            keys = self._keyset_columns(self.query)
+            if not any(column.name == 'id' for column, _ in clone.order_by):
+                clone.order_by.append(IdColumn())
+            condition = self._cursor_condition(keys)
+            if condition is not None:
+                # Sphinx does not support `OR` in `WHERE`: the condition is
+                # selected and filtered by its alias.
+                clone.select.append(condition, '_after')
+                clone.where = self._add_condition(
+                    clone.where, Column(Bool, '_after') == 1)
+            # the values of the keys of each result, to build cursors.
+            for column, _ in keys:
+                if column.name != 'id':
+                    clone.select.append(column, '_key_%s' % column.name)
         return clone
 
+    @staticmethod
+    def _keyset_columns(query):
+        """
+        Returns the ``(column, ascending)`` that order results in keyset
+        pagination: the ordering of ``query`` followed by the id.
+        """
+        if query.group_by:
+            raise NotSupportedError('Keyset pagination does not support '
+                                    'grouped querysets.')
+        keys = list(query.order_by)
+        for column, _ in keys:
+            if not isinstance(column, Column):
+                raise NotSupportedError('Keyset pagination does not support '
+                                        'ordering by expressions.')
+        if not any(column.name == 'id' for column, _ in keys):
+            keys.append((IdColumn(), True))
+        for column, _ in keys:
+            if isinstance(column, WeightColumn) or \
+                    column.type() not in KEYSET_TYPES:
+                raise NotSupportedError('Keyset pagination only supports '
+                                        'ordering by integer, boolean, date '
+                                        'and datetime attributes, not by '
+                                        '"%s".' % column.name)
+        return keys
+
+    @staticmethod
+    def _keyset_ordering(keys):
+        return [('' if ascending else '-') + column.name
+                for column, ascending in keys]
+
+    def _cursor_condition(self, keys):
+        """
+        Returns the condition of the results after the cursor, or ``None`` on
+        the first page.
+        """
+        if self._cursor is None:
+            return None
+        if self._cursor['order'] != self._keyset_ordering(keys):
+            raise ValueError('The cursor does not match the ordering of the '
+                             'queryset.')
+
+        # (k1, k2, ...) > (v1, v2, ...) as k1 > v1 OR (k1 = v1 AND (...))
+        condition = None
+        for (column, ascending), value in reversed(
+                list(zip(keys, self._cursor['after']))):
+            value = Integer(value)
+            term = column > value if ascending else column < value
+            if condition is not None:
+                term = base.Or(term, base.And(column == value, condition))
+            condition = term
+        return condition
+
     def _parsed_results(self):
         """
         Hits Sphinx and parses the results into indexes instances.
         """
-        for result in self._fetch_raw():
-            instance = self._index()
+        return self._parse(self._fetch_raw())
 
-            setattr(instance, 'id', result[0])
-            i = 1  # 1 is id
-            for field in self._index.Meta.fields:
-                if field.is_attribute:
-                    setattr(instance, field.name, field.type().to_python(result[i]))
-                    i += 1
+    def _parse(self, results):
+        """
+        Parses the rows returned by Sphinx into indexes instances.
+        """
+        if self._values is not None:
+            return self._parse_values(results)
+        decode = self._index.get_decoder(self._select_columns(self.query))
+        if not self._keyset:
+            return map(decode, results)
+        return self._parse_keyset(decode, results)
 
+    def _parse_keyset(self, decode, results):
+        positions = self._keyset_positions(self._keyset_columns(self.query))
+        for result in results:
+            instance = decode(result)
+            instance._keyset_values = tuple(result[position]
+                                            for position in positions)
             yield instance
 
+    def _parse_values(self, results):
+        """
+        Parses the rows returned by Sphinx into dictionaries or tuples.
+        """
+        kind, names, positions = self._values
+        columns = self._select_columns(self.query)
+        conversions = base.converters(columns[position][1]
+                                      for position in positions)
+
+        for result in results:
+            values = [result[position] for position in positions]
+            for i, to_python in conversions:
+                values[i] = to_python(values[i])
+
+            if kind == 'dict':
+                yield dict(zip(names, values))
+            elif kind == 'flat':
+                yield values[0]
+            else:
+                yield tuple(values)
+
+    @staticmethod
+    def _select_columns(query):
+        """
+        Returns the ``(name, type)`` of each column selected by ``query``.
+        """
+        if not query.select:
+            return (('id', Integer),)
+        return tuple((alias or expression.name, expression.type())
+                     for expression, alias in query.select)
+
+    @staticmethod
+    def _keyset_positions(keys):
+        """
+        Returns the positions of the values of ``keys`` in a row: the id is
+        its first entry and the other keys are its last entries.
+        """
+        positions = []
+        remaining = sum(column.name != 'id' for column, _ in keys)
+        for column, _ in keys:
+            if column.name == 'id':
+                positions.append(0)
+            else:
+                positions.append(-remaining)
+                remaining -= 1
+        return positions
+
     def __iter__(self):
         if self.query.limit is None:
             raise IndexError('Sphinx does not support unbounded iterations '
-                             'over the results.')
+                             'over the results; use `iterator()`.')
         return self._parsed_results()
 
+    def iterator(self, chunk_size=DEFAULT_FETCH_SIZE):
+        """
+        Iterates over all results without caching them, hitting Sphinx once
+        per ``chunk_size`` results with the same connection. Unbounded
+        querysets are paginated by keyset (see :meth:`after`).
+        """
+        if self.query.limit is not None:
+            query = self._get_query()
+            query.fetch_size = chunk_size
+            yield from self._parse(query)
+            return
+
+        queryset = self if self._keyset else self.after()
+        # otherwise chunks are capped by `max_matches` and the iteration
+        # would stop before the last result.
+        queryset = queryset._with_max_matches(chunk_size)
+        keys = queryset._keyset_columns(queryset.query)
+        ordering = queryset._keyset_ordering(keys)
+        positions = queryset._keyset_positions(keys)
+
+        with self.query._connection.session() as connection:
+            while True:
+                query = queryset._get_query()
+                query.limit = (0, chunk_size)
+                query._connection = connection
+
+                results = list(iter(query))
+                yield from queryset._parse(results)
+                if len(results) < chunk_size:
+                    break
+
+                # the next chunk starts after the last result
+                queryset = queryset.clone()
+                queryset._cursor = {'order': ordering,
+                                    'after': [results[-1][position]
+                                              for position in positions]}
+
     def __len__(self):
-        if self._fetch_cache is not None:
-            return len(self._fetch_cache)
+        if self.query.limit is not None:
+            return len(self._fetch_raw())
         return self.count()
 
     def __getitem__(self, item):
+        """
+        Slices are lazy and return a new queryset; integers hit Sphinx and
+        return the instance.
+        """
         if not isinstance(item, (slice, int)):
             raise TypeError
         if isinstance(item, slice):
             if item.stop is None:
                 raise NotSupportedError('Sphinx does not support '
                                         'unbounded slicing.')
+            start, stop = item.start or 0, item.stop
+        else:
+            start, stop = item, item + 1
 
-        if isinstance(item, slice):
-            offset = item.start or 0
-            count = item.stop - offset
+        # slices of slices are relative to the existing limit.
+        if self.query.limit is not None:
+            offset, count = self.query.limit
+            start, stop = offset + start, offset + min(stop, count)
 
-            clone = self.clone()
-            clone.query.limit = (offset, count)
-            return list(clone)
-        else:
-            offset = item
-            count = 1
-            clone = self.clone()
-            clone.query.limit = (offset, count)
-            return list(clone)[0]
+        clone = self.clone()
+        clone.query.limit = (start, max(stop - start, 0))
+        if stop <= start:
+            clone._fetch_cache = []
+
+        if isinstance(item, slice):
+            return clone
+        return list(clone)[0]
 
     def all(self):
         return self
 
     def count(self):
-        q = self._get_query()
-        q.select.clear()
-        q.select.append(Count(All()))
+        if self._batch is not None:
+            self._batch.execute()
+        if self._meta is not None:
+            return self._meta.total_found
+
+        query = self._count_query()
+        return self._count(query, list(iter(query)))
 
-        result = list(q)
+    def _count_query(self):
+        if self.query.group_by:
+            # the number of groups is the number of results found.
+            q = self._get_query()
+            q.limit = (0, 1)
+            q.with_meta = True
+            return q
+        return self._aggregate_query([(Count(All()), None)])
+
+    @staticmethod
+    def _count(query, result):
+        if query.group_by:
+            return query.meta.total_found
         if result:
             # first row, second entry (first entry is row's `id`)
             return result[0][1]
         else:
             return 0
 
+    def _aggregate_query(self, expressions):
+        """
+        Returns the query that selects ``expressions``, a list of
+        ``(expression, alias)``, over all results (ungrouped).
+        """
+        q = self._get_query()
+        q.select.clear()
+        for expression, alias in expressions:
+            q.select.append(expression, alias)
+        # annotations can be used by filters; aggregates are per group.
+        for alias, expression in self._annotations.items():
+            if not isinstance(expression, (base.Aggregate, base.GroupBy)):
+                q.select.append(expression, alias)
+        if self._keyset and self._cursor is not None:
+            # the filter by `_after` requires it to be selected.
+            q.select.append(self._cursor_condition(
+                self._keyset_columns(self.query)), '_after')
+        q.group_by.clear()
+        q.within_group_order_by.clear()
+        q.order_by.clear()
+        q.limit = None
+        q.with_meta = False
+        return q
+
+    def aggregate(self, **aggregates):
+        """
+        Returns a dictionary that maps each name of ``aggregates`` to the
+        value of its aggregate function (e.g. ``Sum(C('number'))``) over all
+        results, computed by Sphinx.
+        """
+        expressions = []
+        for alias in aggregates:
+            expression = self._resolve_expression(alias, aggregates[alias])
+            if not isinstance(expression, base.Aggregate):
+                raise TypeError('"%s" is not an aggregate function.' % alias)
+            expressions.append((expression, alias))
+        if sum(isinstance(expression, CountDistinct)
+               for expression, _ in expressions) > 1:
+            raise NotSupportedError('Sphinx only supports one COUNT(DISTINCT) '
+                                    'per query.')
+
+        results = list(iter(self._aggregate_query(expressions)))
+
+        values = {}
+        # first entry is row's `id`
+        for position, (expression, alias) in enumerate(expressions, 1):
+            if results:
+                values[alias] = expression.type().to_python(
+                    results[0][position])
+            elif isinstance(expression, Count):
+                values[alias] = 0
+            else:
+                values[alias] = None
+        return values
+
+    def annotate(self, **annotations):
+        """
+        Returns a queryset whose results have, for each name of
+        ``annotations``, an attribute with the value of its expression (e.g.
+        ``Count(All())`` per group, see :meth:`group_by`).
+        """
+        clone = self.clone()
+        clone._annotations = self._annotations.copy()
+        for alias in annotations:
+            if alias in self._annotations or \
+                    alias in self._index.__dict__ or alias == 'id':
+                raise ValueError('The annotation "%s" conflicts with a field '
+                                 'or annotation of the queryset.' % alias)
+            expression = self._resolve_expression(alias, annotations[alias])
+            clone.query.select.append(expression, alias)
+            clone._annotations[alias] = expression
+        return clone
+
+    def _resolve_expression(self, alias, expression):
+        if not isinstance(expression, base.SQLExpression):
+            raise TypeError('"%s" must be an expression, not "%s".' %
+                            (alias, expression.__class__.__name__))
+        return self._resolve(expression)
+
+    def _resolve(self, expression):
+        """
+        Returns ``expression`` with its columns resolved to fields of the index
+        or to annotations of the queryset.
+        """
+        aliases = {alias: Column(annotation.type(), alias)
+                   for alias, annotation in self._annotations.items()}
+        return expression.resolve_columns(self._index, aliases)
+
+    def group_by(self, *fields):
+        """
+        Returns a queryset with one result per group of documents with equal
+        ``fields``, annotated with the number of documents of the group,
+        ``group_count`` (``@count``), and the key of the group, ``group_key``
+        (``@groupby``).
+        """
+        if not fields:
+            raise TypeError('group_by() requires at least one field.')
+        if self.query.group_by:
+            raise NotSupportedError('The queryset is already grouped.')
+
+        clone = self.clone()
+        for name in fields:
+            clone.query.group_by.append(self._resolve_attribute(name))
+        key_type = next(iter(clone.query.group_by)).type()
+        return clone.annotate(
+            **OrderedDict([(GroupCountColumn().name, Count(All())),
+                           (GroupKeyColumn().name, GroupBy(key_type))]))
+
+    def collapse(self, field, per_group=1, order=None):
+        """
+        Returns a queryset with the best ``per_group`` results of each group of
+        documents with equal ``field``, annotated like in :meth:`group_by`.
+        The best results are the first by ``order`` (one or a list of
+        arguments of :meth:`order_by`), by default the ordering of the
+        queryset.
+        """
+        if not isinstance(per_group, int) or isinstance(per_group, bool):
+            raise TypeError('"per_group" must be an integer.')
+        if per_group < 1:
+            raise ValueError('"per_group" must be at least 1.')
+        if order is None:
+            ordering = list(self.query.order_by)
+        else:
+            if not isinstance(order, (list, tuple)):
+                order = (order,)
+            ordering = self._parse_ordering(order)
+
+        clone = self.group_by(field)
+        clone.query.group_by.per_group = per_group
+        for column, ascending in ordering:
+            clone.query.within_group_order_by.append(column,
+                                                     ascending=ascending)
+        return clone
+
+    def facets(self, *fields, limit=DEFAULT_FACET_LIMIT):
+        """
+        Returns a dictionary that maps each of ``fields`` to the list of its
+        (at most ``limit``) most frequent ``(value, count)`` in the results.
+        The facets are retrieved in a single request to Sphinx, together with
+        the results if this queryset was not evaluated.
+        """
+        if not fields:
+            raise TypeError('facets() requires at least one field.')
+        querysets = [self._facet_queryset(name, limit) for name in fields]
+
+        if self._fetch_cache is None and self._batch is None:
+            group = Batch([self] + querysets)
+        else:
+            group = Batch(list(querysets))
+        for queryset in group.querysets:
+            queryset._batch = group
+        group.execute()
+
+        return OrderedDict((name, list(queryset))
+                           for name, queryset in zip(fields, querysets))
+
+    def _facet_queryset(self, name, limit):
+        """
+        Returns the queryset of the ``(value, count)`` of the field ``name``
+        over all results, ordered by count.
+        """
+        clone = self.order_by().group_by(name)
+        # all results: the facet is not limited by a slice or a cursor.
+        clone.query.limit = None
+        clone._keyset, clone._cursor = False, None
+        return clone.values_list('group_key', 'group_count')\
+            .order_by('-@count', '@groupby')[:limit]
+
+    def within_group_order_by(self, *args):
+        """
+        Returns a queryset whose groups are represented by their first
+        document in the ordering ``args`` (same as :meth:`order_by`).
+        """
+        clone = self.clone()
+        if not args:
+            clone.query.within_group_order_by.clear()
+        for column, ascending in self._parse_ordering(args):
+            clone.query.within_group_order_by.append(column,
+                                                     ascending=ascending)
+        return clone
+
     def filter(self, *conditions, **lookups):
         clone = self.clone()
 
@@ -119,12 +595,78 @@ class QuerySet(object):
 
         for condition in conditions:
             assert isinstance(condition, base.SQLExpression)
-            condition = condition.resolve_columns(self._index)
+            condition = self._resolve(condition)
             assert condition.type() == Bool
             clone.query.where = self._add_condition(clone.query.where, condition)
 
         return clone
 
+    def values(self, *fields):
+        """
+        Returns a queryset whose results are dictionaries that map each of
+        ``fields`` (by default all attributes) to its value.
+        """
+        return self._values_clone('dict', fields)
+
+    def values_list(self, *fields, flat=False):
+        """
+        Returns a queryset whose results are tuples with the values of
+        ``fields`` (by default all attributes) or, if ``flat`` is ``True``,
+        the value of the single field.
+        """
+        if flat and len(fields) != 1:
+            raise TypeError('"flat" is only valid when values_list is called '
+                            'with a single field.')
+        return self._values_clone('flat' if flat else 'tuple', fields)
+
+    def _values_clone(self, kind, fields):
+        if not fields:
+            fields = ['id'] + [field.name for field in self._index.Meta.fields
+                               if field.is_attribute] + \
+                list(self._annotations)
+
+        clone = self.clone()
+        clone.query.select.clear()
+        positions = []
+        for name in fields:
+            if name in ('id', '@id'):
+                # the id is always the first column
+                positions.append(0)
+                continue
+            if name in self._annotations:
+                clone.query.select.append(self._annotations[name], name)
+            else:
+                clone.query.select.append(self._resolve_attribute(name))
+            positions.append(len(clone.query.select) - 1)
+        # annotations remain selected: they can be used by e.g. the ordering.
+        for name in self._annotations:
+            if name not in fields:
+                clone.query.select.append(self._annotations[name], name)
+        if not clone.query.select:
+            clone.query.select.append(IdColumn())
+
+        clone._values = (kind, tuple(fields), tuple(positions))
+        return clone
+
+    def _resolve_attribute(self, name):
+        """
+        Returns the column of the attribute ``name`` of the index.
+        """
+        column = C(name).resolve_columns(self._index)
+        if not column.is_attribute:
+            raise NotSupportedError('Field "%s" is not an attribute: '
+                                    'Sphinx does not store its value.' % name)
+        return column
+
+    def with_meta(self):
+        """
+        Returns a queryset that retrieves Sphinx ``SHOW META`` together with
+        its results, available in :attr:`meta`.
+        """
+        clone = self.clone()
+        clone.query.with_meta = True
+        return clone
+
     def search(self, *extended_queries):
         clone = self.clone()
         if clone._match == '':
@@ -135,7 +677,9 @@ class QuerySet(object):
 
     def order_by(self, *args):
         """
-        Only accepts Neg, C, Columns
+        Accepts names of fields or annotations (prefixed by ``-`` for
+        descending order) and expressions (negated, ``-expression``, for
+        descending order).
         """
         clone = self.clone()
 
@@ -143,6 +687,16 @@ class QuerySet(object):
             clone.query.order_by.clear()
             return clone
 
+        for column, ascending in self._parse_ordering(args):
+            clone.query.order_by.append(column, ascending=ascending)
+
+        return clone
+
+    def _parse_ordering(self, args):
+        """
+        Returns the ``(column, ascending)`` of each argument of an ordering.
+        """
+        ordering = []
         for arg in args:
             # parse string
             if isinstance(arg, str):
@@ -154,22 +708,78 @@ class QuerySet(object):
                 else:
                     arg = C(arg)
 
-            # parse negation of column
-            assert isinstance(arg, (Neg, C, Column))
+            if not isinstance(arg, base.SQLExpression):
+                raise TypeError('Cannot order by "%s".' % arg)
+            # parse negation of expression
             ascending = True
             if isinstance(arg, Neg):
                 ascending = False
                 arg = arg.value[0]
-                assert isinstance(arg, (C, Column))
-            if isinstance(arg, C):
-                column = arg.resolve_columns(clone._index)
-            else:
-                column = arg
 
-            clone.query.order_by.append(column, ascending=ascending)
+            ordering.append((self._resolve(arg), ascending))
 
+        return ordering
+
+    def options(self, **options):
+        """
+        Returns a queryset with Sphinx ``OPTION`` set (e.g. ``ranker``,
+        ``max_matches``, ``cutoff``, ``max_query_time``, ``field_weights``).
+        """
+        clone = self.clone()
+        for name in options:
+            if name == 'field_weights':
+                for field_name in options[name]:
+                    C(field_name).resolve_columns(self._index)
+            clone.query.option.append(name, options[name])
         return clone
 
+    def _with_max_matches(self, count):
+        """
+        Returns a queryset whose ``max_matches`` (set by :meth:`options` or
+        Sphinx default) is at least ``count``, so Sphinx returns up to
+        ``count`` results.
+        """
+        max_matches = int(self.query.option.get('max_matches',
+                                                DEFAULT_MAX_MATCHES))
+        if max_matches >= count:
+            return self
+        return self.options(max_matches=count)
+
+    def after(self, cursor=None):
+        """
+        Returns a queryset paginated by keyset: the results after the
+        ``cursor`` of the previous page (see :meth:`get_cursor`), or the first
+        page if ``cursor`` is ``None``.
+        """
+        clone = self.clone()
+        clone._keyset = True
+        clone._cursor = None if cursor is None else _decode_cursor(cursor)
+        self._keyset_columns(clone.query)
+        return clone
+
+    def get_cursor(self, instance):
+        """
+        Returns the cursor of the position of ``instance``, a result of this
+        queryset paginated by keyset.
+        """
+        if not hasattr(instance, '_keyset_values'):
+            raise ValueError('Cursors are only available on results of '
+                             'querysets paginated by keyset (see `after`).')
+        return _encode_cursor(
+            self._keyset_ordering(self._keyset_columns(self.query)),
+            instance._keyset_values)
+
+    @property
+    def next_cursor(self):
+        """
+        The cursor of the page after this one, or ``None`` if this is the last
+        page. Hits Sphinx if the queryset was not evaluated.
+        """
+        results = list(self)
+        if not results or len(results) < self.query.limit[1]:
+            return None
+        return self.get_cursor(results[-1])
+
     def _set_default_fields(self, query):
         fields = self._index.Meta.fields
 
@@ -186,27 +796,255 @@ class QuerySet(object):
             where = where |And| condition
         return where
 
+    def __copy__(self):
+        # faster than the default `copy`, used on every clone.
+        clone = self.__class__.__new__(self.__class__)
+        clone.__dict__.update(self.__dict__)
+        return clone
+
     def clone(self):
-        clone = QuerySet(self._index)
-        clone._match = self._match
+        clone = copy(self)
         clone.query = self.query.clone()
+        clone._result_cache = None
+        clone._fetch_cache = None
+        clone._meta = None
+        clone._batch = None
         return clone
 
 
-class SearchQuerySet(django.db.models.query.QuerySet):
+class Batch(object):
+    """
+    Querysets evaluated together, in a single request to Sphinx.
+    """
+    def __init__(self, querysets):
+        self.querysets = querysets
+        self._executed = False
+
+    def execute(self):
+        if self._executed:
+            return
+
+        statements = []
+        bounded = []
+        for queryset in self.querysets:
+            query = queryset._get_query()
+            bounded.append(query.limit is not None and query.limit[1] > 0)
+            if not bounded[-1]:
+                # its results can't be iterated; only its meta is used.
+                query.limit = (0, 1)
+            statements.append((query.as_sql(), query.get_params()))
+            statements.append(('SHOW META', []))
+
+        connection = self.querysets[0].query._connection
+        results = connection.batch(statements)
+
+        for i, queryset in enumerate(self.querysets):
+            queryset._fetch_cache = results[2*i] if bounded[i] else []
+            queryset._meta = QueryMeta()
+            queryset._meta.update(results[2*i + 1])
+        self._executed = True
+
+
+def batch(*querysets):
+    """
+    Returns clones of ``querysets`` that are evaluated together, in a single
+    request to Sphinx, when any of them is evaluated.
+    """
+    clones = [queryset.clone() for queryset in querysets]
+    group = Batch(clones)
+    for clone in clones:
+        clone._batch = group
+    return clones
+
+
+def hydration_chunk_size():
+    """
+    Returns the maximum number of ids of each Django query that retrieves
+    search results, ``settings.INDEXES['hydration_chunk_size']``
+    (``DEFAULT_HYDRATION_CHUNK_SIZE`` by default).
+    """
+    from django.conf import settings
+    return settings.INDEXES.get('hydration_chunk_size',
+                                DEFAULT_HYDRATION_CHUNK_SIZE)
+
+
+class SurvivalRatios(object):
+    """
+    A thread-safe LRU mapping from shapes of queries to the fraction of their
+    search results that pass their Django query, as observed so far.
+    """
+    def __init__(self, size=SURVIVAL_RATIOS_SIZE):
+        self.size = size
+        self._ratios = OrderedDict()  # shape: (kept, fetched)
+        self._lock = threading.Lock()
+
+    def get(self, shape):
+        """
+        Returns the observed ratio of ``shape``, or ``None`` if unknown.
+        """
+        with self._lock:
+            observed = self._ratios.get(shape)
+        if observed is None or not observed[1]:
+            return None
+        return observed[0] / observed[1]
+
+    def update(self, shape, kept, fetched):
+        with self._lock:
+            old_kept, old_fetched = self._ratios.pop(shape, (0, 0))
+            self._ratios[shape] = (old_kept + kept, old_fetched + fetched)
+            while len(self._ratios) > self.size:
+                self._ratios.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._ratios.clear()
+
+
+survival_ratios = SurvivalRatios()
+
+
+class SearchQuerySet(AsyncSearchQuerySetMixin,
+                     django.db.models.query.QuerySet):
     """
     A queryset to translate search results into Django models.
     """
     max_search_count = 1000
 
-    def __init__(self, index, query=None, using=None, hints=None):
+    def __init__(self, index, query=None, using=None, hints=None,
+                 sphinx_queryset=None):
         super(SearchQuerySet, self).__init__(index.Meta.model, query, using, hints=hints)
         self._index = index
-        self._sphinx_queryset = QuerySet(index)
+        if sphinx_queryset is None:
+            sphinx_queryset = QuerySet(index).with_meta()
+        self._sphinx_queryset = sphinx_queryset
 
         self._result_cache = None
+        self._search_meta = None
+        # the sliced `_sphinx_queryset` whose results are used.
+        self._search_queryset = None
+        # (start, stop): annotated models of the slices of the results.
+        self._page_cache = {}
+        # the budget of adaptive fetching, `None` if not used.
+        self._adaptive_budget = None
+        # whether models are built from the search results (see
+        # `from_index`) and the number of conditions of the Django query
+        # that are also conditions of the search (see `filter`).
+        self._from_index = False
+        self._sphinx_filters = 0
         self.search_mode = False
 
+    @property
+    def search_meta(self):
+        """
+        The :class:`~sphinxql.core.query.QueryMeta` of the Sphinx query, or
+        ``None`` if Sphinx was not hit yet.
+        """
+        return self._search_meta
+
+    def _search_results(self):
+        """
+        Hits Sphinx and returns the (at most `max_search_count`) index
+        instances of the search.
+        """
+        queryset = self._get_search_queryset()
+        results = list(queryset)
+        self._search_meta = queryset.meta
+        return results
+
+    def _get_search_queryset(self):
+        if self._search_queryset is None:
+            self._search_queryset = \
+                self._sphinx_queryset[:self.max_search_count]
+        return self._search_queryset
+
+    def filter(self, *args, **kwargs):
+        """
+        Django ``filter``. Lookups on model fields that are attributes of the
+        index are also applied to the search, see `_sphinx_conditions`.
+        """
+        clone = super(SearchQuerySet, self).filter(*args, **kwargs)
+        conditions = self._sphinx_conditions(kwargs)
+        if conditions:
+            clone._sphinx_queryset = clone._sphinx_queryset.filter(*conditions)
+        if not args and len(conditions) == len(kwargs):
+            clone._sphinx_filters += len(clone.query.where.children) - \
+                len(self.query.where.children)
+        return clone
+
+    def _sphinx_conditions(self, lookups):
+        """
+        Returns the Sphinx conditions equivalent to the Django ``lookups`` on
+        the primary key and on model fields that are attributes of the index
+        (see `DJANGO_LOOKUPS`). Only attributes whose values Sphinx compares
+        exactly (see `KEYSET_TYPES`) are translated; the Django filter is
+        always kept.
+        """
+        fields = {field.model_attr: field for field in self._index.Meta.fields
+                  if field.is_attribute and isinstance(field.model_attr, str)
+                  and field.type() in KEYSET_TYPES}
+        pk_names = ('pk', self.model._meta.pk.name)
+
+        conditions = []
+        for lookup in lookups:
+            value = lookups[lookup]
+            path, _, django_lookup = lookup.rpartition(LOOKUP_SEPARATOR)
+            if django_lookup not in DJANGO_LOOKUPS:
+                path, django_lookup = lookup, 'exact'
+            sphinx_lookup = DJANGO_LOOKUPS[django_lookup]
+
+            if path in pk_names:
+                name, attribute_type = 'id', Integer
+            elif path in fields:
+                name = fields[path].name
+                attribute_type = fields[path].type()
+            else:
+                continue
+            if sphinx_lookup in ('in', 'range'):
+                if not isinstance(value, (list, tuple, set)) or not value:
+                    continue
+                value = [self._prepare_value(path, attribute_type,
+                                             item)
+                         for item in value]
+                if None in value:
+                    continue
+            else:
+                value = self._prepare_value(path, attribute_type, value)
+                if value is None:
+                    continue
+            conditions.append(parse_lookup(
+                name + LOOKUP_SEPARATOR + sphinx_lookup, value))
+        return conditions
+
+    def _prepare_value(self, path, attribute_type, value):
+        """
+        Returns ``value`` as Django compares it with the model field of
+        ``path`` (e.g. ``'5'`` as ``5`` or a datetime as a date), in the
+        convention of the index (naive datetimes in the current time zone),
+        or ``None`` if it can't be compared in Sphinx as an attribute of
+        ``attribute_type``.
+        """
+        if path == 'pk':
+            field = self.model._meta.pk
+        else:
+            opts = self.model._meta
+            for name in path.split(LOOKUP_SEPARATOR):
+                field = opts.get_field(name)
+                if field.is_relation:
+                    opts = field.related_model._meta
+        try:
+            value = field.to_python(value)
+        except (ValidationError, TypeError, ValueError):
+            # e.g. model instances or Django expressions
+            return None
+
+        if isinstance(value, datetime.datetime) and \
+                timezone.is_aware(value):
+            value = timezone.make_naive(value, timezone.get_current_timezone())
+        # e.g. a date of a `DateTime` or a bool of an `Integer`
+        if type(value) is not attribute_type._python_type:
+            return None
+        return value
+
     def search_filter(self, *conditions, **lookups):
         clone = self._clone()
         clone._sphinx_queryset = self._sphinx_queryset.filter(*conditions,
@@ -226,6 +1064,67 @@ class SearchQuerySet(django.db.models.query.QuerySet):
         clone._sphinx_queryset = clone._sphinx_queryset.order_by(*columns)
         return clone
 
+    def search_options(self, **options):
+        clone = self._clone()
+        clone._sphinx_queryset = clone._sphinx_queryset.options(**options)
+        return clone
+
+    def search_after(self, cursor=None):
+        """
+        Returns a queryset whose search results are paginated by keyset, see
+        :meth:`QuerySet.after`.
+        """
+        clone = self._clone()
+        clone._sphinx_queryset = clone._sphinx_queryset.after(cursor)
+        return clone
+
+    def get_cursor(self, obj):
+        """
+        Returns the cursor of the position of ``obj``, a result of this
+        queryset paginated by keyset.
+        """
+        return self._sphinx_queryset.get_cursor(obj.search_result)
+
+    def search_collapse(self, field, per_group=1, order=None):
+        """
+        Returns a queryset whose search results are the best ``per_group`` of
+        each group of equal ``field``, see :meth:`QuerySet.collapse`.
+        """
+        clone = self._clone()
+        clone._sphinx_queryset = clone._sphinx_queryset.collapse(
+            field, per_group=per_group, order=order)
+        return clone
+
+    def search_adaptive(self, budget=DEFAULT_ADAPTIVE_BUDGET):
+        """
+        Returns a queryset whose slices, when filtered by Django, are filled by
+        fetching search results in growing windows, up to ``budget`` results.
+        """
+        if not isinstance(budget, int) or isinstance(budget, bool):
+            raise TypeError('"budget" must be an integer.')
+        if budget < 1:
+            raise ValueError('"budget" must be at least 1.')
+        clone = self._clone()
+        clone._adaptive_budget = budget
+        return clone
+
+    def from_index(self):
+        """
+        Returns a queryset whose models are built from the search results,
+        without hitting the database: fields that are not attributes of the
+        index are deferred. See `_from_index_models`.
+        """
+        clone = self._clone()
+        clone._from_index = True
+        return clone
+
+    def facets(self, *fields, limit=DEFAULT_FACET_LIMIT):
+        """
+        Returns the facets of the search results, retrieved in the same request
+        as them, see :meth:`QuerySet.facets`.
+        """
+        return self._get_search_queryset().facets(*fields, limit=limit)
+
     def _has_explicit_ordering(self):
         """
         A weaker version of ``ordered`` that ignores default ordering and
@@ -243,30 +1142,233 @@ class SearchQuerySet(django.db.models.query.QuerySet):
             return self._result_cache
 
         # hit Sphinx: ordered results with index objects populated
-        indexes = OrderedDict([(index_obj.id, index_obj)
-                               for index_obj in
-                               self._sphinx_queryset[:self.max_search_count]])
+        search_results = self._search_results()
 
         # hit Django: ordered results with model objects populated
-        clone = self._get_query(indexes.keys())
-        models = OrderedDict([(obj.id, obj) for obj in clone])
+        self._result_cache = self._hydrate(search_results)
+        return self._result_cache
+
+    def _hydrate(self, search_results):
+        """
+        Returns the models of ``search_results`` annotated with their
+        `search_result`, from Django or from the index (see `from_index`).
+        """
+        if self._from_index:
+            return self._from_index_models(search_results)
+        models = []
+        for id_list in self._id_chunks(
+                [index_obj.id for index_obj in search_results]):
+            models.extend(self._get_query(id_list))
+        return self._annotate(search_results, models)
+
+    def _id_chunks(self, id_list):
+        """
+        Returns the lists of ids of the Django queries that retrieve the models
+        of `id_list`: a single one in Postgres, where ids are an array, or when
+        the models are in the order of Django, chunks of at most
+        `hydration_chunk_size` ids otherwise.
+        """
+        chunk_size = hydration_chunk_size()
+        if self._is_postgresql() or not self._is_search_ordered() or \
+                len(id_list) <= chunk_size:
+            return [id_list]
+        return [id_list[start:start + chunk_size]
+                for start in range(0, len(id_list), chunk_size)]
+
+    def _is_postgresql(self):
+        return connections[self.db].vendor == 'postgresql'
+
+    def _from_index_models(self, search_results):
+        """
+        Returns the models built from ``search_results`` with
+        ``Model.from_db``: the primary key is the id and each concrete field of
+        the model that is the ``model_attr`` of an attribute of the index has
+        its value. The other fields are deferred (loaded from the database on
+        access). The Django query must only have filters also applied to the
+        search and no explicit ordering.
+        """
+        if self.query.has_filters() and \
+                len(self.query.where.children) != self._sphinx_filters:
+            raise NotSupportedError('Models built from the index only support '
+                                    'Django filters that are also applied to '
+                                    'the search (see `filter`).')
+        if self._has_explicit_ordering():
+            raise NotSupportedError('Models built from the index are in the '
+                                    'ordering of the search.')
+
+        opts = self.model._meta
+        model_fields = {opts.pk.attname: (None, opts.pk)}
+        for field in self._index.Meta.fields:
+            if not field.is_attribute or not isinstance(field.model_attr, str):
+                continue
+            try:
+                model_field = opts.get_field(field.model_attr)
+            except FieldDoesNotExist:
+                continue
+            if model_field.concrete and not model_field.many_to_many:
+                model_fields.setdefault(model_field.attname,
+                                        (field.name, model_field))
+        # `from_db` requires the values in the order of the concrete fields.
+        loaded = [(name, model_field)
+                  for name, model_field in (model_fields.get(f.attname)
+                                            for f in opts.concrete_fields)
+                  if model_field is not None]
+        field_names = [model_field.attname for _, model_field in loaded]
+
+        model = self.model
+        deferred = {f.attname for f in opts.concrete_fields} - \
+            set(field_names)
+        if deferred and django.VERSION < (1, 10):
+            # before Django 1.10, `from_db` only defers fields of deferred
+            # classes.
+            from django.db.models.query_utils import deferred_class_factory
+            model = deferred_class_factory(model, deferred)
+
+        models = []
+        for index_obj in search_results:
+            values = [model_field.to_python(getattr(index_obj, name or 'id'))
+                      for name, model_field in loaded]
+            obj = model.from_db(self.db, field_names, values)
+            obj.search_result = index_obj
+            models.append(obj)
+        return models
+
+    def _annotate(self, search_results, models):
+        """
+        Returns the `models` annotated with their `search_result`.
+        """
+        indexes = OrderedDict([(index_obj.id, index_obj)
+                               for index_obj in search_results])
+        models = OrderedDict([(obj.id, obj) for obj in models])
 
         # exclude objects excluded by Django query
         # annotate models with search_result.
-        self._result_cache = []
-        if self._sphinx_queryset.query.order_by and \
-                not self._has_explicit_ordering():
+        results = []
+        if self._is_search_ordered():
             for id in indexes:
                 if id in models:
                     # annotate `search_result`
                     models[id].search_result = indexes[id]
-                    self._result_cache.append(models[id])
+                    results.append(models[id])
         else:
             for id in models:
                 # annotate `search_result`
                 models[id].search_result = indexes[id]
-                self._result_cache.append(models[id])
-        return self._result_cache
+                results.append(models[id])
+        return results
+
+    def _is_search_ordered(self):
+        """
+        Returns whether the results are in the ordering of the search.
+        """
+        return bool(self._sphinx_queryset.query.order_by) and \
+            not self._has_explicit_ordering()
+
+    def _page_queryset(self, start, stop):
+        """
+        Returns the key of the results from ``start`` to ``stop`` in
+        `_page_cache` and the Sphinx queryset of their search results. The
+        queryset is already evaluated if the search results were retrieved
+        before (e.g. with the facets).
+        """
+        stop = min(stop, self.max_search_count)
+        start = min(start, stop)
+
+        search_queryset = self._search_queryset
+        if search_queryset is not None and \
+                search_queryset._fetch_cache is not None:
+            queryset = search_queryset[start:stop]
+            queryset._fetch_cache = search_queryset._fetch_cache[start:stop]
+            queryset._meta = search_queryset.meta
+        else:
+            queryset = self._sphinx_queryset[start:stop]
+        return (start, stop), queryset
+
+    def _page(self, start, stop):
+        """
+        Returns the annotated models of the results from ``start`` to
+        ``stop``, hitting Sphinx and Django only for them. Requires the results
+        to be in the ordering of the search and not filtered by Django.
+        """
+        key, queryset = self._page_queryset(start, stop)
+        if key not in self._page_cache:
+            search_results = list(queryset)
+            self._search_meta = queryset.meta
+            self._page_cache[key] = self._hydrate(search_results)
+        return self._page_cache[key]
+
+    def _adaptive_page(self, start, stop):
+        """
+        Returns the annotated models of the results from ``start`` to
+        ``stop``, fetching search results in windows of growing size until
+        Django kept ``stop`` of them or the budget is exhausted. The first
+        window is sized by the survival ratio of the shape of the query.
+        """
+        if (start, stop) in self._page_cache:
+            return self._page_cache[(start, stop)]
+        budget = self._adaptive_budget
+        shape = self._shape()
+        ratio = survival_ratios.get(shape) if shape is not None else None
+        if ratio is None:
+            window = max(stop, ADAPTIVE_FIRST_WINDOW)
+        elif ratio > 0:
+            window = math.ceil(stop / ratio)
+        else:
+            window = budget
+        window = max(1, min(window, budget))
+
+        results = []
+        fetched = 0
+        while True:
+            queryset = self._sphinx_queryset[fetched:fetched + window]
+            queryset = queryset._with_max_matches(fetched + window)
+            search_results = list(queryset)
+            self._search_meta = queryset.meta
+            results += self._hydrate(search_results)
+            fetched += len(search_results)
+
+            if len(results) >= stop or len(search_results) < window or \
+                    fetched >= budget:
+                break
+            window = min(window * ADAPTIVE_GROWTH, budget - fetched)
+
+        if shape is not None and fetched:
+            survival_ratios.update(shape, len(results), fetched)
+        page = results[start:stop]
+        self._page_cache[(start, stop)] = page
+        return page
+
+    def _shape(self):
+        """
+        Returns the shape of the query, independent of its values, or ``None``
+        if the Django query matches nothing.
+        """
+        try:
+            django_sql = self.query.sql_with_params()[0]
+        except EmptyResultSet:
+            return None
+        return self._sphinx_queryset._get_query().fingerprint(), django_sql
+
+    def _is_filtered_by_django(self):
+        """
+        Returns whether Django can exclude search results: not when the models
+        are built from the index, whose Django filters are in the search.
+        """
+        return self.query.has_filters() and not self._from_index
+
+    def _is_pageable(self, item):
+        """
+        Returns whether ``item`` can be retrieved with `_page` (or with
+        `_adaptive_page` if the results are filtered by Django).
+        """
+        if self._result_cache is not None or not self._is_search_ordered():
+            return False
+        if self._is_filtered_by_django() and self._adaptive_budget is None:
+            return False
+        if isinstance(item, slice):
+            return item.step is None and item.stop is not None and \
+                (item.start or 0) >= 0 and item.stop >= 0
+        return isinstance(item, int) and item >= 0
 
     def _get_query(self, id_list=None):
         """
@@ -274,10 +1376,30 @@ class SearchQuerySet(django.db.models.query.QuerySet):
         If `id_list` is None, hits Sphinx to retrieve it.
         """
         if id_list is None:
-            id_list = [index_obj.id for index_obj in
-                       self._sphinx_queryset[:self.max_search_count]]
+            id_list = [index_obj.id for index_obj in self._search_results()]
         clone = self._clone()
-        clone = clone.filter(pk__in=id_list)
+        # Django's filter: the ids are the results of the search.
+        if self._is_postgresql():
+            # a single array parameter instead of one parameter per id: the
+            # SQL is the same for any number of ids.
+            opts = self.model._meta
+            quote_name = connections[self.db].ops.quote_name
+            column = '%s.%s' % (quote_name(opts.db_table),
+                                quote_name(opts.pk.column))
+            clone = clone.extra(
+                where=['%s = ANY(%%s::bigint[])' % column],
+                params=['{%s}' % ','.join(str(int(id)) for id in id_list)])
+        else:
+            clone = super(SearchQuerySet, clone).filter(pk__in=id_list)
+
+        # the relations the index declares to be retrieved with the models.
+        meta = self._index.Meta
+        select_related = getattr(meta, 'hydrate_select_related', ())
+        if select_related and clone.query.select_related is not True:
+            clone = clone.select_related(*select_related)
+        prefetch_related = getattr(meta, 'hydrate_prefetch_related', ())
+        if prefetch_related:
+            clone = clone.prefetch_related(*prefetch_related)
         clone.search_mode = False
         return clone
 
@@ -288,19 +1410,48 @@ class SearchQuerySet(django.db.models.query.QuerySet):
 
     def __len__(self):
         if self.search_mode:
-            return len(self._get_query())
+            return len(self._annotated_models())
         return super(SearchQuerySet, self).__len__()
 
     def __getitem__(self, item):
         if self.search_mode:
+            if self._is_pageable(item):
+                get_page = self._page
+                if self._is_filtered_by_django():
+                    get_page = self._adaptive_page
+                if isinstance(item, slice):
+                    return get_page(item.start or 0, item.stop)
+                page = get_page(item, item + 1)
+                if not page:
+                    raise IndexError('list index out of range')
+                return page[0]
             return self._annotated_models()[item]
         return super(SearchQuerySet, self).__getitem__(item)
 
     def count(self):
+        """
+        In :attr:`search_mode`, returns the number of search results that
+        pass the Django query, reusing the results already retrieved.
+        """
         if self.search_mode:
+            if self._result_cache is not None or self._from_index:
+                return len(self._annotated_models())
+            # the ids of the search are retrieved once per queryset.
             return self._get_query().count()
         return super(SearchQuerySet, self).count()
 
+    def search_count(self):
+        """
+        Returns the number of matches of the search in Sphinx (``total_found``
+        of :attr:`search_meta`), not limited by :attr:`max_search_count` nor
+        filtered by the conditions of the Django query that are not applied in
+        Sphinx (see `filter`). Hits Sphinx only if the search was not retrieved
+        yet.
+        """
+        if self._search_meta is None:
+            self._search_results()
+        return self._search_meta.total_found
+
     def _clone(self, klass=None, setup=False, **kwargs):
         ## almost-copy of original _clone:
         if klass is None:
@@ -308,8 +1459,10 @@ class SearchQuerySet(django.db.models.query.QuerySet):
         query = self.query.clone()
         if self._sticky_filter:
             query.filter_is_sticky = True
-        # next line is different: first argument is index instead of model
-        c = klass(index=self._index, query=query, using=self._db)
+        # next line is different: first argument is index instead of model.
+        # The Sphinx queryset is shared: it is never modified, only replaced.
+        c = klass(index=self._index, query=query, using=self._db,
+                  sphinx_queryset=self._sphinx_queryset)
         c._for_write = self._for_write
         c._prefetch_related_lookups = self._prefetch_related_lookups[:]
         c._known_related_objects = self._known_related_objects
@@ -319,5 +1472,7 @@ class SearchQuerySet(django.db.models.query.QuerySet):
 
         # sphinx related
         c.search_mode = self.search_mode
-        c._sphinx_queryset = self._sphinx_queryset.clone()
+        c._adaptive_budget = self._adaptive_budget
+        c._from_index = self._from_index
+        c._sphinx_filters = self._sphinx_filters
         return c
@@ -1,5 +1,7 @@
-from .core.base import Match, Neg, Count, All
-from .core.columns import Column, IdColumn, WeightColumn
+from .core.base import Match, Neg, Count, CountDistinct, Sum, Avg, Min, Max, \
+    GroupBy, All
+from .core.columns import Column, IdColumn, WeightColumn, GroupCountColumn, \
+    GroupKeyColumn
 
 
 import sphinxql.core.base
@@ -10,14 +12,21 @@ class C(sphinxql.core.base.SQLExpression):
     The only element capable of resolving columns
     from strings.
     """
-    def resolve_columns(self, index):
+    def resolve_columns(self, index, aliases=None):
         """
-        Returns the ``Field`` (that is, a Column) of an ``Index`` from its name.
+        Returns the ``Field`` (that is, a Column) of an ``Index`` from its name,
+        or the column of ``aliases`` (a dictionary alias: column) with it.
         """
-        if self._value == '@id':
+        if aliases and self._value in aliases:
+            return aliases[self._value]
+        elif self._value == '@id':
             return IdColumn()
         elif self._value == '@relevance':
             return WeightColumn()
+        elif self._value == '@count':
+            return GroupCountColumn()
+        elif self._value == '@groupby':
+            return GroupKeyColumn()
 
         try:
             return index.__dict__[self._value]
@@ -1,5 +1,7 @@
+import importlib.util
 import shutil
 import os
+import sys
 
 from io import StringIO
 from django.conf import settings
@@ -14,6 +16,12 @@ try:
 except ImportError:
     pass
 
+# asynchronous queries require Python >= 3.6 and aiomysql; their tests use
+# `asyncio.run` (Python >= 3.7) and are in modules only imported when this is
+# `True`.
+ASYNC_SUPPORTED = sys.version_info >= (3, 7) and \
+    importlib.util.find_spec('aiomysql') is not None
+
 
 class SphinxQLTestCase(TransactionTestCase):
 
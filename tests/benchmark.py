@@ -0,0 +1,193 @@
+"""
+Micro-benchmarks of Django-SphinxQL.
+
+They are not part of the test suite; run them with::
+
+    DJANGO_SETTINGS_MODULE=tests.settings_test python -m tests.benchmark
+
+Benchmarks that hit searchd require it to be running with the indexes of
+``tests.queryset`` populated (e.g. by the ``index_sphinx`` command).
+"""
+import copy
+import time
+
+
+def operations_per_second(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return repeat / (time.perf_counter() - start)
+
+
+def report(name, before, after):
+    print('{0:<40} before: {1:>10.1f}/s  after: {2:>10.1f}/s  ({3:.2f}x)'
+          .format(name, before, after, after / before))
+
+
+def _legacy_iterator(db, sql, params):
+    """
+    The fetch path of ``Connection.iterator`` prior to batched fetching:
+    executes the statement twice and fetches rows one by one.
+    """
+    cursor = db.cursor()
+    cursor.execute(sql, params)
+    cursor.execute(sql, params)
+    for x in range(cursor.rowcount):
+        yield cursor.fetchone()
+    cursor.close()
+
+
+def _legacy_parse(index, results):
+    """
+    The row parsing of ``QuerySet`` prior to precompiled decoders.
+    """
+    for result in results:
+        instance = index()
+
+        setattr(instance, 'id', result[0])
+        i = 1  # 1 is id
+        for field in index.Meta.fields:
+            if field.is_attribute:
+                setattr(instance, field.name, field.type().to_python(result[i]))
+                i += 1
+
+        yield instance
+
+
+def benchmark_decode(index, count=1000, repeat=200):
+    """
+    Pages of ``count`` rows decoded per second; does not hit searchd.
+    """
+    from sphinxql.query import QuerySet
+    from sphinxql.types import Date
+
+    queryset = QuerySet(index)
+    # a timestamp for dates, an integer otherwise
+    row = tuple(1428149532 if issubclass(field.type(), Date) else 1
+                for field in index.Meta.fields if field.is_attribute)
+    results = [(i,) + row for i in range(count)]
+
+    report('decode %d rows (pages)' % count,
+           operations_per_second(
+               lambda: list(_legacy_parse(index, results)), repeat),
+           operations_per_second(
+               lambda: list(queryset._parse(results)), repeat))
+
+
+def _legacy_clone(queryset):
+    """
+    ``QuerySet.clone`` prior to copy-on-write statements: builds a new
+    queryset and deep copies the statements of its query.
+    """
+    from sphinxql.core.query import Query
+    from sphinxql.query import QuerySet
+
+    clone = QuerySet(queryset._index)
+    clone._match = queryset._match
+    clone.query = Query(queryset.query._connection)
+    clone.query._statements = copy.deepcopy(queryset.query._statements)
+    return clone
+
+
+def benchmark_filter_chain(index, steps=10, repeat=2000):
+    """
+    Chains of ``steps`` filters (and the query they hit Sphinx with) built per
+    second; does not hit searchd.
+    """
+    from sphinxql.query import QuerySet
+
+    def chain():
+        queryset = QuerySet(index).search('hello')
+        for step in range(steps):
+            queryset = queryset.filter(number__gt=step)
+        queryset.order_by('-number')[:20]._get_query()
+
+    clone = QuerySet.clone
+    QuerySet.clone = _legacy_clone
+    try:
+        before = operations_per_second(chain, repeat)
+    finally:
+        QuerySet.clone = clone
+
+    report('%d-step filter chain (chains)' % steps, before,
+           operations_per_second(chain, repeat))
+
+
+def benchmark_fetch(index, count=1000, repeat=200):
+    """
+    Queries per second of fetching ``count`` rows from searchd.
+    """
+    from sphinxql.configuration.connection import get_pool
+    from sphinxql.core.query import Query
+
+    query = Query()
+    query.fromm.append(index)
+    query.limit = (0, count)
+    sql, params = query.as_sql(), query.get_params()
+
+    def legacy():
+        pool = get_pool()
+        db = pool.acquire()
+        try:
+            list(_legacy_iterator(db, sql, params))
+        finally:
+            pool.release(db)
+
+    def current():
+        list(iter(query))
+
+    report('fetch %d rows (queries)' % count,
+           operations_per_second(legacy, repeat),
+           operations_per_second(current, repeat))
+
+
+def benchmark_hydration(index, counts=(100, 1000, 10000), repeat=20):
+    """
+    Hydrations of ``count`` ids per second with Django's ``pk__in`` (before)
+    and with the query of the database backend (after), and the plans of
+    both queries. Requires the database of ``tests.queryset`` populated.
+    """
+    from django.db import connection
+    from sphinxql.query import SearchQuerySet
+
+    model = index.Meta.model
+    # ordered by the search: the ids are chunked in backends without arrays.
+    queryset = SearchQuerySet(index).search_order_by('@id')
+    for count in counts:
+        ids = list(range(1, count + 1))
+        results = []
+        for id in ids:
+            result = index()
+            result.id = id
+            results.append(result)
+
+        before = model.objects.filter(pk__in=ids)
+        after = queryset._get_query(ids)
+        for name, query in (('pk__in', before), (connection.vendor, after)):
+            sql, params = query.query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN ' + sql, params)
+                print('plan of %s with %d ids:' % (name, count))
+                for row in cursor.fetchall():
+                    print('    ' + ' '.join(str(column) for column in row))
+
+        report('hydrate %d ids (hydrations)' % count,
+               operations_per_second(lambda: list(before.all()), repeat),
+               operations_per_second(
+                   lambda: queryset._hydrate(results), repeat))
+
+
+def main():
+    import django
+    django.setup()
+
+    from tests.queryset.indexes import DocumentIndex
+
+    benchmark_decode(DocumentIndex)
+    benchmark_filter_chain(DocumentIndex)
+    benchmark_fetch(DocumentIndex)
+    benchmark_hydration(DocumentIndex)
+
+
+if __name__ == '__main__':
+    main()
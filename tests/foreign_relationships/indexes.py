@@ -17,6 +17,8 @@ class DocumentIndex(indexes.Index):
 
     class Meta:
         model = Document
+        hydrate_select_related = ('type',)
+        hydrate_prefetch_related = ('type__type',)
 
 
 class DocumentIndex1(indexes.Index):
@@ -1,7 +1,9 @@
 import datetime
+from sphinxql import indexes
 from sphinxql.core.base import Date
+from sphinxql.exceptions import ImproperlyConfigured
 
-from sphinxql.query import Query
+from sphinxql.query import Query, SearchQuerySet
 
 from .indexes import DocumentIndex
 from .models import Document, Type, MainType
@@ -31,3 +33,26 @@ class IndexTestCase(SphinxQLTestCase):
         self.assertEqual('MainType1', result[0][4])
         self.assertEqual('MainType1 Type1', result[0][5])
         self.assertEqual(self.date, Date.to_python(result[0][6]))
+
+    def test_hydrate_relations(self):
+        query = SearchQuerySet(DocumentIndex).search('nice')
+        # the documents, and their main types (prefetched).
+        with self.assertNumQueries(2):
+            result = list(query)
+            self.assertEqual('Type1', result[0].type.name)
+            self.assertEqual('MainType1', result[0].type.type.name)
+
+    def test_hydrate_relations_not_a_tuple(self):
+        with self.assertRaises(ImproperlyConfigured):
+            class Index(indexes.Index):
+                class Meta:
+                    model = Document
+                    hydrate_select_related = 'type'
+
+    def test_from_index_deferred_fields(self):
+        # `type` is not an attribute of the index: it is deferred.
+        query = SearchQuerySet(DocumentIndex).search('nice').from_index()
+        with self.assertNumQueries(0):
+            documents = list(query)
+            self.assertEqual(documents[0].text, 'What a nice text')
+        self.assertEqual(documents[0].type.name, 'Type1')
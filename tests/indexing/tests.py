@@ -100,3 +100,13 @@ class IndexSeveralTestCase(SphinxQLTestCase):
     def test_range_query(self):
         self.query.select.append(Count(All()))
         self.assertEqual(list(self.query)[0][1], 1000)
+
+    def test_fetch_size(self):
+        self.query.limit = (0, 1000)
+        self.query.fetch_size = 7
+        self.assertEqual(len(self.query), 1000)
+
+    def test_unbuffered(self):
+        self.query.limit = (0, 1000)
+        self.query.unbuffered = True
+        self.assertEqual(len(list(self.query)), 1000)
@@ -1,5 +1,6 @@
 import datetime
 
+from sphinxql.configuration.connection import get_pool
 from sphinxql.core.query import Query
 from sphinxql.sql import Match
 from sphinxql.types import String
@@ -101,3 +102,16 @@ class QueryTestCase(SphinxQLTestCase):
     def test_match(self):
         self.query.where = Match("foo")
         self.assertEqual(len(self.query), 1)
+
+    def test_connection_is_pooled(self):
+        # `list(self.query)` would also call `Query.__len__`.
+        list(iter(self.query))
+        statistics = get_pool().statistics()
+
+        list(iter(self.query))
+        list(iter(self.query.clone()))
+
+        new_statistics = get_pool().statistics()
+        self.assertEqual(new_statistics['created'], statistics['created'])
+        self.assertEqual(new_statistics['reused'], statistics['reused'] + 2)
+        self.assertEqual(new_statistics['in_use'], 0)
@@ -0,0 +1,19 @@
+"""
+Coroutines of the tests of asynchronous queries, which require Python >= 3.6
+(see `tests.ASYNC_SUPPORTED`).
+"""
+
+
+async def evaluate_queryset(query):
+    numbers = [x.number async for x in query[:3]]
+    return numbers, await query.acount()
+
+
+async def evaluate_search_queryset(query):
+    numbers = [x.number async for x in query]
+    page = await query.aget_page(2, per_page=5)
+    return numbers, page, await query.acount()
+
+
+async def get_page(query, number, per_page):
+    return await query.aget_page(number, per_page=per_page)
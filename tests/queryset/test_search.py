@@ -1,14 +1,24 @@
+import asyncio
 import datetime
+from unittest import skipUnless
 
-from django.db.models import Sum
+import django
 
-from sphinxql.query import SearchQuerySet
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q, Sum
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from sphinxql.configuration.connection import get_pool
+from sphinxql.exceptions import NotSupportedError
+from sphinxql.query import SearchQuerySet, survival_ratios
 from sphinxql.sql import C
 
 from .indexes import DocumentIndex
 from .models import Document
 
-from tests import SphinxQLTestCase
+from tests import SphinxQLTestCase, ASYNC_SUPPORTED
 
 
 class SearchQuerySetTestCase(SphinxQLTestCase):
@@ -76,6 +86,61 @@ class SearchQuerySetTestCase(SphinxQLTestCase):
         for x in q:
             self.assertTrue(hasattr(x, 'sum'))
 
+    def test_search_meta(self):
+        q = self.query.search('@text What')
+        self.assertEqual(q.search_meta, None)
+        list(q)
+        self.assertEqual(q.search_meta.total_found, 100)
+
+    def test_search_options(self):
+        q = self.query.search('@text What').search_options(ranker='none')
+        # all results have the same relevance and Sphinx orders them by id.
+        self.assertEqual(q[0].number, 2)
+
+    def test_search_after(self):
+        query = self.query.search_order_by('number').search('@text What')\
+            .filter(number__gt=20)
+
+        page = query.search_after()[:5]
+        self.assertEqual([x.number for x in page], [22, 24, 26, 28, 30])
+
+        page = query.search_after(query.get_cursor(page[-1]))[:5]
+        self.assertEqual([x.number for x in page], [32, 34, 36, 38, 40])
+
+    def test_search_collapse(self):
+        query = self.query.search_order_by('-number').search('@text What')\
+            .search_collapse('summary', per_group=2)
+
+        self.assertEqual([(x.number, x.search_result.group_count)
+                          for x in query], [(200, 100), (198, 100)])
+
+    def test_facets(self):
+        # a Django filter: the facets are of the search results only.
+        query = self.query.search('@text What').filter(Q(number__lte=40))
+
+        facets = query.facets('summary', limit=5)
+        self.assertEqual(facets, {'summary': [('This is a summary', 100)]})
+        with self.assertNumQueries(1):
+            self.assertEqual(len(list(query)), 20)
+        self.assertEqual(query.search_meta.total_found, 100)
+
+    @skipUnless(ASYNC_SUPPORTED and django.VERSION >= (3, 0),
+                'requires Python >= 3.7, aiomysql and Django >= 3.0')
+    def test_async(self):
+        from .asynchronous import evaluate_search_queryset, get_page
+
+        q = self.query.search('@text What').filter(number__lte=40)
+        numbers, page, count = asyncio.run(evaluate_search_queryset(q))
+        self.assertEqual(numbers, list(range(40, 0, -2)))
+        self.assertEqual([x.number for x in page], [30, 28, 26, 24, 22])
+        self.assertEqual(count, 20)
+
+        # only the models of the page are retrieved
+        q = self.query.search_order_by('-number').search('@text What')
+        page = asyncio.run(get_page(q, 2, per_page=5))
+        self.assertEqual([x.number for x in page], [190, 188, 186, 184, 182])
+        self.assertIsNone(q._result_cache)
+
     def test_data_is_cached(self):
         query = self.query.all()
         with self.assertNumQueries(1):
@@ -89,6 +154,90 @@ class SearchQuerySetTestCase(SphinxQLTestCase):
             query[0:20]
             list(query)
 
+    def test_page(self):
+        query = self.query.search('@text What')
+        with self.assertNumQueries(1):
+            page = query[10:15]
+            self.assertIs(query[10:15], page)
+        self.assertEqual([x.number for x in page], list(range(180, 170, -2)))
+
+        with self.assertNumQueries(1):
+            self.assertEqual(query[3].number, 194)
+
+        # Django filters are applied before slicing
+        query = query.filter(number__lte=50)
+        self.assertEqual([x.number for x in query[:2]], [50, 48])
+
+    def test_hydration_chunks(self):
+        query = self.query.search('@text What')
+        expected = [x.number for x in query]
+        self.assertEqual(len(expected), 100)
+
+        with override_settings(INDEXES=dict(settings.INDEXES,
+                                            hydration_chunk_size=30)):
+            query = self.query.search('@text What')
+            # Postgres retrieves the ids with a single array
+            num_queries = 1 if connection.vendor == 'postgresql' else 4
+            with self.assertNumQueries(num_queries):
+                self.assertEqual([x.number for x in query], expected)
+
+    def test_search_adaptive(self):
+        survival_ratios.clear()
+        query = self.query.search_order_by('-number').search('@text What')
+
+        # Q filters are applied by Django only.
+        q = query.filter(Q(number__lte=20)).search_adaptive(budget=1000)
+        self.assertEqual([x.number for x in q[:5]], [20, 18, 16, 14, 12])
+
+        # the observed survival ratio (10%) sizes the first window (50)
+        q = query.filter(Q(number__lte=10)).search_adaptive(budget=1000)
+        with self.assertNumQueries(2):
+            self.assertEqual([x.number for x in q[:5]], [10, 8, 6, 4, 2])
+
+        # the budget is exhausted before any result passes the filter
+        q = query.filter(Q(number__lte=10)).search_adaptive(budget=30)
+        self.assertEqual(q[:5], [])
+
+        # windows are not truncated by a smaller `max_matches`
+        q = query.search_options(max_matches=20).filter(Q(number__lte=10))\
+            .search_adaptive(budget=1000)
+        self.assertEqual([x.number for x in q[:5]], [10, 8, 6, 4, 2])
+
+    def test_from_index(self):
+        query = self.query.search('@text What').filter(number__lte=10)\
+            .from_index()
+        with self.assertNumQueries(0):
+            documents = list(query)
+            self.assertEqual(query.count(), 5)
+
+        document = Document.objects.get(number=2)
+        documents = {x.number: x for x in documents}
+        self.assertEqual(sorted(documents), [2, 4, 6, 8, 10])
+        self.assertEqual(documents[2].pk, document.pk)
+        self.assertEqual(documents[2].summary, document.summary)
+        self.assertEqual(documents[2].date, document.date)
+
+        with self.assertRaises(NotSupportedError):
+            list(query.exclude(number=4))
+
+    def test_count(self):
+        query = self.query.search('@text What').filter(Q(number__lte=50))
+        statistics = get_pool().statistics()
+
+        with self.assertNumQueries(1):
+            self.assertEqual(len(query), 25)
+            self.assertEqual(query.count(), 25)
+        self.assertEqual(query.search_count(), 100)
+
+        # a single request to Sphinx
+        new_statistics = get_pool().statistics()
+        self.assertEqual(new_statistics['created'] + new_statistics['reused'],
+                         statistics['created'] + statistics['reused'] + 1)
+
+        # lookups applied in Sphinx too (see `filter`) restrict the matches.
+        query = self.query.search('@text What').filter(number__lte=50)
+        self.assertEqual(query.search_count(), 25)
+
     def test_search_override_default_ordering(self):
         self.assertEqual(self.query[0].number, 2)
 
@@ -160,6 +309,12 @@ class HighNumberSearchQuerySetTestCase(SphinxQLTestCase):
         self.assertEqual(len(query), 910)
         self.assertEqual(query.count(), 910)
 
+        # the filter is also applied by Sphinx: its results are ids 95-1004
+        self.assertEqual(len(query.search('@text nice')), 910)
+        self.assertEqual(query.search('nice').count(), 910)
+
+        # filters with `Q` are only applied by Django
+        query = self.query.filter(Q(number__gte=95))
         # since search results are ordered by id, they are ids 1-1000,
         # thus, the first 94 (id 1-94) + last 5 (id 1000-1005) are discarded
         self.assertEqual(len(query.search('@text nice')), 906)
@@ -168,3 +323,36 @@ class HighNumberSearchQuerySetTestCase(SphinxQLTestCase):
         query = query.search_order_by(-C('@id'))
         self.assertEqual(len(query.search('@text nice')), 910)
         self.assertEqual(query.search('nice').count(), 910)
+
+    def test_filter_pushdown(self):
+        # one lookup per call: the order of keyword arguments is arbitrary
+        # before Python 3.6.
+        query = self.query.filter(number__gte=95)\
+            .filter(date__lt=datetime.date(2015, 2, 2) +
+                    datetime.timedelta(days=100))\
+            .filter(pk__in=[1, 96, 97])
+
+        self.assertEqual(query._sphinx_queryset.query.where.sql(),
+                         '((`number` >= 95) AND (`date` < 1431475200)) '
+                         'AND (`id` IN (1, 96, 97))')
+        self.assertEqual(sorted(x.number for x in query.search('nice')),
+                         [96, 97])
+
+    def test_filter_pushdown_values(self):
+        def where(query):
+            return query._sphinx_queryset.query.where.sql()
+
+        # values are compared as Django compares them with the model field
+        self.assertEqual(where(self.query.filter(number='10')), '`number` = 10')
+        self.assertEqual(where(self.query.filter(number=10.7)), '`number` = 10')
+
+        query = self.query.filter(date=datetime.datetime(2015, 2, 3, 12))
+        self.assertEqual(where(query), '`date` = 1422921600')
+        self.assertEqual([x.number for x in query.search('nice')], [2])
+
+        # aware datetimes are in the current time zone, like the index
+        utc_minus_6 = datetime.timezone(datetime.timedelta(hours=-6))
+        with timezone.override(utc_minus_6):
+            query = self.query.filter(added_time=datetime.datetime(
+                2020, 1, 1, 12, tzinfo=datetime.timezone.utc))
+            self.assertEqual(where(query), '`added_time` = 1577858400')
@@ -1,15 +1,17 @@
+import asyncio
 import datetime
-from unittest import expectedFailure
+from unittest import expectedFailure, skipUnless
 
 from sphinxql.core.base import Or
 from sphinxql.exceptions import NotSupportedError
-from sphinxql.query import QuerySet
-from sphinxql.sql import C, Between
+from sphinxql.configuration.connection import get_pool
+from sphinxql.query import QuerySet, batch
+from sphinxql.sql import C, Between, All, Count, CountDistinct, Sum, Max
 
 from .indexes import DocumentIndex
 from .models import Document
 
-from tests import SphinxQLTestCase
+from tests import SphinxQLTestCase, ASYNC_SUPPORTED
 
 
 def ids_set(query):
@@ -141,6 +143,16 @@ class SimpleQuerySetTestCase(SimpleTestCase):
         self.assertEqual(result.number, self.document.number)
 
 
+    def test_decoder(self):
+        columns = self.query._select_columns(self.query.query)
+        decoder = DocumentIndex.get_decoder(columns)
+        self.assertIs(DocumentIndex.get_decoder(columns), decoder)
+
+        result = list(self.query[:1])[0]
+        self.assertEqual(result.id, self.document.id)
+        self.assertEqual(result.date, self.document.date)
+
+
 class QuerySetLookupTestCase(SimpleTestCase):
 
     def test_only_1_lookup(self):
@@ -231,6 +243,208 @@ class QuerySetTestCase(SphinxQLTestCase):
         q = QuerySet(DocumentIndex).search('@text What').order_by(C('number'))
         self.assertEqual(q[0].number, 2)
 
+    def test_order_by_expression(self):
+        q = QuerySet(DocumentIndex).order_by((C('number') - 101)**2, '-number')
+        self.assertEqual([x.number for x in q[:3]], [102, 100, 104])
+
+        q = QuerySet(DocumentIndex).order_by(-(C('number') * -1))
+        self.assertEqual(q.values_list('number', flat=True)[0], 2)
+
+        with self.assertRaises(NotSupportedError):
+            QuerySet(DocumentIndex).order_by(C('number')*2).after()
+
+    def test_meta(self):
+        page = QuerySet(DocumentIndex).search('@text What')[:20]
+        self.assertEqual(len(page), 20)
+        self.assertEqual(page.meta, None)
+
+        page = QuerySet(DocumentIndex).search('@text What').with_meta()[:20]
+        self.assertEqual(len(page), 20)
+        self.assertEqual(page.meta.total_found, 100)
+        self.assertEqual(page.meta.keywords[0][:2], ('what', 100))
+        self.assertEqual(page.count(), 100)
+
+    def test_options(self):
+        # one option per call: the order of keyword arguments is arbitrary
+        # before Python 3.6.
+        query = QuerySet(DocumentIndex).search('@text What')\
+            .options(ranker='none').options(max_matches=50)\
+            .options(field_weights={'text': 2})
+
+        self.assertTrue(query.query.as_sql().endswith(
+            ' OPTION ranker=none, max_matches=50, field_weights=(text=2)'))
+        self.assertEqual(len(query[:10]), 10)
+
+        with self.assertRaises(KeyError):
+            query.options(field_weights={'textERROR': 2})
+
+    def test_lazy_slicing(self):
+        query = QuerySet(DocumentIndex).order_by('number')
+
+        page = query[10:20]
+        self.assertEqual(page.query.limit, (10, 10))
+        self.assertEqual([x.number for x in page[2:4]], [26, 28])
+        self.assertEqual(page[0].number, 22)
+        self.assertEqual(len(page[20:30]), 0)
+
+    def test_values(self):
+        query = QuerySet(DocumentIndex).filter(number__lte=6).order_by('number')
+
+        self.assertEqual(list(query.values('number', 'date')[:3]), [
+            {'number': x*2, 'date': datetime.date(2015, 2, 2) +
+                                    datetime.timedelta(days=x)}
+            for x in range(1, 4)])
+
+        ids = [x.id for x in query[:3]]
+        self.assertEqual(list(query.values_list('id', 'number')[:3]),
+                         list(zip(ids, [2, 4, 6])))
+        self.assertEqual(list(query.values_list('id', flat=True)[:3]), ids)
+        self.assertEqual(list(query.values_list('id', flat=True).iterator()),
+                         ids)
+
+        with self.assertRaises(TypeError):
+            query.values_list('id', 'number', flat=True)
+        with self.assertRaises(KeyError):
+            query.values('numberERROR')
+
+    def test_aggregate(self):
+        query = QuerySet(DocumentIndex)
+
+        self.assertEqual(query.aggregate(total=Sum(C('number')),
+                                         highest=Max(C('number')),
+                                         count=Count(All())),
+                         {'total': 10100, 'highest': 200, 'count': 100})
+        self.assertEqual(query.filter(number__lte=6)
+                         .aggregate(numbers=CountDistinct(C('number'))),
+                         {'numbers': 3})
+        self.assertEqual(query.filter(number__gt=1000)
+                         .aggregate(count=Count(All()), total=Sum(C('number'))),
+                         {'count': 0, 'total': None})
+
+        with self.assertRaises(TypeError):
+            query.aggregate(number=C('number'))
+
+    def test_group_by(self):
+        query = QuerySet(DocumentIndex).group_by('summary')
+
+        self.assertEqual(len(query), 1)
+        self.assertEqual(list(query.values('group_key', 'group_count')[:10]),
+                         [{'group_key': 'This is a summary',
+                           'group_count': 100}])
+
+        query = QuerySet(DocumentIndex).filter(number__lte=6)\
+            .annotate(double=C('number')*2).group_by('number')\
+            .within_group_order_by('-date').order_by('-@groupby')
+        self.assertEqual([(x.group_key, x.group_count, x.double)
+                          for x in query[:10]],
+                         [(6, 1, 12), (4, 1, 8), (2, 1, 4)])
+
+    def test_annotate(self):
+        query = QuerySet(DocumentIndex).filter(number__lte=10)\
+            .annotate(score=C('number')*(-1) + 100)
+
+        self.assertEqual([x.score for x in query.order_by('score')[:2]],
+                         [80, 82])
+        filtered = query.filter(score__gt=95)
+        self.assertEqual([x.number for x in filtered[:10]], [2, 4])
+        self.assertEqual(filtered.count(), 2)
+        self.assertEqual(list(filtered.values_list('score', flat=True)[:10]),
+                         [98, 96])
+
+        with self.assertRaises(ValueError):
+            query.annotate(number=C('number') + 1)
+
+    def test_collapse(self):
+        query = QuerySet(DocumentIndex).collapse('summary', per_group=3,
+                                                 order='-number')
+
+        self.assertEqual([(x.number, x.group_count) for x in query[:10]],
+                         [(200, 100), (198, 100), (196, 100)])
+
+        query = QuerySet(DocumentIndex).filter(number__lte=6)\
+            .order_by('number').collapse('summary')
+        self.assertEqual([x.number for x in query[:10]], [2])
+
+        with self.assertRaises(ValueError):
+            query.collapse('summary', per_group=0)
+
+    def test_facets(self):
+        query = QuerySet(DocumentIndex).filter(number__lte=10)[:2]
+        statistics = get_pool().statistics()
+
+        facets = query.facets('summary', 'number', limit=3)
+        self.assertEqual(facets, {'summary': [('This is a summary', 5)],
+                                  'number': [(2, 1), (4, 1), (6, 1)]})
+        self.assertEqual(len(list(query)), 2)
+
+        # the results were retrieved in the same request as the facets.
+        new_statistics = get_pool().statistics()
+        self.assertEqual(new_statistics['created'] + new_statistics['reused'],
+                         statistics['created'] + statistics['reused'] + 1)
+
+        with self.assertRaises(KeyError):
+            query.facets('numberERROR')
+
+    def test_keyset_pagination(self):
+        query = QuerySet(DocumentIndex).search('@text What').order_by('-date')
+
+        numbers = []
+        page = query.after()[:30]
+        while page is not None:
+            numbers += [x.number for x in page]
+            cursor = page.next_cursor
+            page = query.after(cursor)[:30] if cursor else None
+        self.assertEqual(numbers, list(range(200, 0, -2)))
+
+        page = query.after()[:30]
+        last = list(page)[-1]
+        self.assertEqual(page.get_cursor(last), page.next_cursor)
+        self.assertEqual(query.after(page.next_cursor).count(), 70)
+
+        with self.assertRaises(ValueError):
+            list(query.order_by('number').after(page.next_cursor)[:30])
+        with self.assertRaises(NotSupportedError):
+            query.order_by(C('@relevance')).after()
+
+    def test_single_request(self):
+        statistics = get_pool().statistics()
+
+        list(QuerySet(DocumentIndex)[:10])
+        QuerySet(DocumentIndex).count()
+
+        new_statistics = get_pool().statistics()
+        self.assertEqual(new_statistics['created'] + new_statistics['reused'],
+                         statistics['created'] + statistics['reused'] + 2)
+
+    def test_batch(self):
+        query = QuerySet(DocumentIndex).search('@text What')
+
+        page, total, filtered = batch(query.order_by('number')[:10], query,
+                                      query.filter(number__lte=20))
+
+        statistics = get_pool().statistics()
+        self.assertEqual([x.number for x in page], list(range(2, 22, 2)))
+        self.assertEqual(total.count(), 100)
+        self.assertEqual(filtered.count(), 10)
+        self.assertEqual(page.count(), 100)
+
+        # a single request for all querysets
+        new_statistics = get_pool().statistics()
+        self.assertEqual(new_statistics['created'] + new_statistics['reused'],
+                         statistics['created'] + statistics['reused'] + 1)
+
+        with self.assertRaises(IndexError):
+            list(total)
+
+    @skipUnless(ASYNC_SUPPORTED, 'requires Python >= 3.7 and aiomysql')
+    def test_async(self):
+        from .asynchronous import evaluate_queryset
+
+        query = QuerySet(DocumentIndex).order_by('number')
+        numbers, count = asyncio.run(evaluate_queryset(query))
+        self.assertEqual(numbers, [2, 4, 6])
+        self.assertEqual(count, 100)
+
 
 class LargeQuerySetTestCase(SphinxQLTestCase):
 
@@ -258,6 +472,32 @@ class LargeQuerySetTestCase(SphinxQLTestCase):
 
         self.assertEqual(len(list(iter(QuerySet(DocumentIndex)[:1000]))), 1000)
 
+    def test_iterator(self):
+        statistics = get_pool().statistics()
+
+        query = QuerySet(DocumentIndex).filter(number__gt=30)
+        self.assertEqual([x.id for x in query.iterator(chunk_size=100)],
+                         sorted(ids_set(self.documents.filter(number__gt=30))))
+
+        # a single connection for all chunks
+        new_statistics = get_pool().statistics()
+        self.assertEqual(new_statistics['created'] + new_statistics['reused'],
+                         statistics['created'] + statistics['reused'] + 1)
+
+        numbers = [x.number for x in
+                   QuerySet(DocumentIndex).order_by('-number').iterator(300)]
+        self.assertEqual(numbers, list(range(2008, 0, -2)))
+
+        # chunks larger than Sphinx default `max_matches`
+        numbers = [x.number for x in
+                   QuerySet(DocumentIndex).order_by('-number').iterator(2000)]
+        self.assertEqual(numbers, list(range(2008, 0, -2)))
+
+        # chunks larger than the `max_matches` of the queryset
+        numbers = [x.number for x in QuerySet(DocumentIndex)
+                   .order_by('-number').options(max_matches=100).iterator(300)]
+        self.assertEqual(numbers, list(range(2008, 0, -2)))
+
     def test_filter(self):
         sphinx_query = QuerySet(DocumentIndex).filter(number__gt=30)[:1000]
         django_query = self.documents.filter(number__gt=30)
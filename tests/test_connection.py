@@ -0,0 +1,27 @@
+from unittest import TestCase
+
+import MySQLdb
+
+from sphinxql.configuration.connection import ConnectionPool
+
+
+class ConnectionPoolTestCase(TestCase):
+
+    def setUp(self):
+        # nothing listens on port 1, so connecting always fails.
+        self.pool = ConnectionPool('127.0.0.1', 1, size=2, max_idle=1)
+
+    def test_statistics(self):
+        self.assertEqual(self.pool.statistics(),
+                         {'size': 2, 'max_idle': 1, 'in_use': 0, 'idle': 0,
+                          'created': 0, 'reused': 0, 'discarded': 0,
+                          'waits': 0})
+
+    def test_failed_connection_is_released(self):
+        for x in range(3):
+            with self.assertRaises(MySQLdb.OperationalError):
+                self.pool.acquire()
+
+        statistics = self.pool.statistics()
+        self.assertEqual(statistics['in_use'], 0)
+        self.assertEqual(statistics['created'], 0)
@@ -2,8 +2,9 @@ from unittest import TestCase, expectedFailure
 import datetime
 
 from sphinxql.core.base import Function, Or
-from sphinxql.sql import Column, And, In, NotIn, Between, NotBetween
-from sphinxql.types import Integer, Bool, Date
+from sphinxql.sql import C, Column, And, In, NotIn, Between, NotBetween, \
+    Count, CountDistinct, Sum, Avg, Max, GroupBy, All
+from sphinxql.types import Integer, Float, Bool, Date, String
 
 
 class ExpressionTestCase(TestCase):
@@ -153,7 +154,8 @@ class OtherTestCase(TestCase):
         r = self.column + 2.2
 
         self.assertEqual(r.type(), Integer)
-        self.assertEqual(r.as_sql(), '`test` + 2.200000')
+        self.assertEqual(r.as_sql(), '`test` + %s')
+        self.assertEqual(r.sql(), '`test` + 2.200000')
 
     def test_bool(self):
 
@@ -161,24 +163,79 @@ class OtherTestCase(TestCase):
 
         self.assertEqual(Bool(True).type(), Bool)
         self.assertEqual(r.type(), Integer)
-        self.assertEqual(r.as_sql(), '`test` + TRUE')
+        self.assertEqual(r.as_sql(), '`test` + %s')
+        self.assertEqual(r.sql(), '`test` + 1')
 
     def test_dates(self):
 
         r = Date(datetime.date(2014, 2, 2)) > datetime.date(2014, 3, 2)
 
         self.assertEqual(r.type(), Bool)
-        self.assertEqual(r.as_sql(), '1391299200 > 1393718400')
+        self.assertEqual(r.as_sql(), '%s > %s')
+        self.assertEqual(r.get_params(), [1391299200, 1393718400])
 
     def test_datetimes(self):
 
         r = Date(datetime.datetime(2014, 2, 2, 12, 12, 12)) > datetime.datetime(2014, 2, 2, 12, 12, 13)
 
         self.assertEqual(r.type(), Bool)
-        self.assertEqual(r.as_sql(), '1391343132 > 1391343133')
+        self.assertEqual(r.as_sql(), '%s > %s')
+        self.assertEqual(r.get_params(), [1391343132, 1391343133])
 
     def test_wrong_type(self):
         self.assertRaises(TypeError, Date.__lt__, Date(datetime.datetime(2014, 2, 2)), And)
 
     def test_wrong_function_arguments(self):
         self.assertRaises(IndexError, Function, [1, 2])
+
+
+class AggregateTestCase(TestCase):
+    def setUp(self):
+        self.column = Column(Integer, 'test')
+
+    def test_count(self):
+        self.assertEqual(Count(All()).sql(), 'COUNT(*)')
+        self.assertEqual(CountDistinct(self.column).sql(),
+                         'COUNT(DISTINCT `test`)')
+        self.assertEqual(CountDistinct(self.column).type(), Integer)
+
+    def test_functions(self):
+        self.assertEqual(Sum(self.column * 2).sql(), 'SUM(`test` * 2)')
+        self.assertEqual(Sum(self.column).type(), Integer)
+        self.assertEqual(Avg(self.column).sql(), 'AVG(`test`)')
+        self.assertEqual(Avg(self.column).type(), Float)
+        self.assertEqual(Max(Column(Date, 'date')).type(), Date)
+
+    def test_group_by(self):
+        self.assertEqual(GroupBy().sql(), 'GROUPBY()')
+        self.assertEqual(GroupBy(String).type(), String)
+
+
+class MockIndex:
+    test = Column(Integer, 'test')
+
+
+class ResolveColumnsTestCase(TestCase):
+
+    def test_not_mutated(self):
+        expression = (C('test') + 1) > 2
+
+        resolved = expression.resolve_columns(MockIndex)
+
+        self.assertIsNot(resolved, expression)
+        self.assertEqual(resolved.sql(), '`test` + 1 > 2')
+        self.assertIsInstance(expression.value[0].value[0], C)
+
+    def test_resolved_is_shared(self):
+        expression = (Column(Integer, 'test') + 1) > 2
+
+        self.assertIs(expression.resolve_columns(MockIndex), expression)
+
+    def test_aliases(self):
+        expression = (C('score') + C('test')) > 2
+
+        resolved = expression.resolve_columns(
+            MockIndex, {'score': Column(Integer, 'score')})
+
+        self.assertEqual(resolved.sql(), '`score` + `test` > 2')
+        self.assertRaises(KeyError, expression.resolve_columns, MockIndex)
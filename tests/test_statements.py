@@ -1,8 +1,11 @@
+from collections import OrderedDict
 from unittest import TestCase
 
-from sphinxql.sql import Column
-from sphinxql.types import Integer
-from sphinxql.core.query import SelectStatement, FromStatement
+from sphinxql.sql import Column, IdColumn, And, Count, All
+from sphinxql.types import Integer, String
+from sphinxql.core.query import Query, SelectStatement, FromStatement, \
+    QueryMeta, OptionStatement, SQLCache, MAX_ORDER_BY_ALLOWED
+from sphinxql.exceptions import NotSupportedError
 
 
 class SelectStatementTestCase(TestCase):
@@ -26,6 +29,13 @@ class SelectStatementTestCase(TestCase):
 
         self.assertEqual(select.sql(), '`id`, `test` AS test, `test` * 2 AS ss, `test` * 3')
 
+    def test_only_id(self):
+        select = SelectStatement()
+
+        select.append(IdColumn())
+
+        self.assertEqual(select.as_sql(), '`id`')
+
 
 class MockIndex:
 
@@ -59,3 +69,206 @@ class FromStatementTestCase(TestCase):
         fromm.append(MockIndex('test'))
         with self.assertRaises(AssertionError):
             fromm.append(MockIndex('test'))
+
+
+class QueryCloneTestCase(TestCase):
+
+    def test_clone_is_independent(self):
+        query = Query()
+        query.fromm.append(MockIndex('test'))
+        query.select.append(Column(Integer, 'test'))
+
+        clone = query.clone()
+        clone.select.append(Column(Integer, 'test1'))
+        clone.order_by.append(Column(Integer, 'test'))
+        clone.option.append('cutoff', 10)
+        clone.fromm.append(MockIndex('test1'))
+
+        self.assertEqual(query.as_sql(), 'SELECT `id`, `test` FROM test')
+        self.assertEqual(clone.as_sql(), 'SELECT `id`, `test`, `test1` FROM '
+                                         'test, test1 ORDER BY `test` ASC '
+                                         'OPTION cutoff=10')
+
+
+class FingerprintTestCase(TestCase):
+
+    def query(self, number, text):
+        query = Query()
+        query.fromm.append(MockIndex('test'))
+        query.select.append(Column(Integer, 'number'))
+        query.where = (Column(Integer, 'number') > number) |And| \
+            (Column(String, 'text') == text)
+        return query
+
+    def test_same_shape(self):
+        self.assertEqual(self.query(2, 'a').fingerprint(),
+                         self.query(3, 'b').fingerprint())
+        self.assertEqual(hash(self.query(2, 'a').fingerprint()),
+                         hash(self.query(2, 'b').fingerprint()))
+
+    def test_different_shape(self):
+        query = self.query(2, 'a')
+        other = query.clone()
+        other.order_by.append(Column(Integer, 'number'))
+
+        self.assertNotEqual(query.fingerprint(), other.fingerprint())
+
+    def test_cached_sql(self):
+        query = self.query(2, 'a')
+        self.assertEqual(query.as_sql(), query._compile())
+        self.assertEqual(query.get_params(), [2, 'a'])
+        self.assertEqual(self.query(3, 'b').get_params(), [3, 'b'])
+
+    def test_limit(self):
+        query = self.query(2, 'a')
+        query.limit = (10, 20)
+        self.assertTrue(query.as_sql().endswith(' LIMIT %s, %s'))
+        self.assertEqual(query.get_params(), [2, 'a', 10, 20])
+
+    def test_group_by(self):
+        query = self.query(2, 'a')
+        other = query.clone()
+        other.group_by.append(Column(Integer, 'number'))
+
+        self.assertNotEqual(query.fingerprint(), other.fingerprint())
+        self.assertEqual(query.get_params(), other.get_params())
+
+
+class OrderByTestCase(TestCase):
+
+    def test_expression(self):
+        query = Query()
+        query.fromm.append(MockIndex('test'))
+        query.select.append(Column(Integer, 'number'))
+        query.order_by.append(Column(Integer, 'number') * 2, ascending=False)
+        query.order_by.append(Column(Integer, 'number'))
+
+        self.assertEqual(query.as_sql(),
+                         'SELECT `id`, `number`, `number` * %s AS _order_0 '
+                         'FROM test ORDER BY _order_0 DESC, `number` ASC')
+        self.assertEqual(query.get_params(), [2])
+
+    def test_max_expressions(self):
+        query = Query()
+        for x in range(MAX_ORDER_BY_ALLOWED):
+            query.order_by.append(Column(Integer, 'number%d' % x))
+        # replacing a column does not add an expression
+        query.order_by.append(Column(Integer, 'number0'), ascending=False)
+
+        self.assertRaises(NotSupportedError, query.order_by.append,
+                          Column(Integer, 'number') + 1)
+
+
+class GroupByTestCase(TestCase):
+
+    def test_basic(self):
+        query = Query()
+        query.fromm.append(MockIndex('test'))
+        query.select.append(Count(All()), 'group_count')
+        query.group_by.append(Column(Integer, 'number'))
+        query.within_group_order_by.append(Column(Integer, 'date'),
+                                           ascending=False)
+        query.order_by.append(Column(Integer, 'group_count'),
+                              ascending=False)
+
+        self.assertEqual(query.as_sql(),
+                         'SELECT `id`, COUNT(*) AS group_count FROM test '
+                         'GROUP BY `number` '
+                         'WITHIN GROUP ORDER BY `date` DESC '
+                         'ORDER BY `group_count` DESC')
+
+    def test_per_group(self):
+        query = Query()
+        query.fromm.append(MockIndex('test'))
+        query.group_by.append(Column(Integer, 'number'))
+        fingerprint = query.fingerprint()
+        query.group_by.per_group = 3
+        query.limit = (0, 10)
+
+        self.assertEqual(query.as_sql(), 'SELECT * FROM test '
+                                         'GROUP %s BY `number` LIMIT %s, %s')
+        self.assertEqual(query.get_params(), [3, 0, 10])
+        self.assertNotEqual(query.fingerprint()[3], fingerprint[3])
+
+    def test_clone_is_independent(self):
+        query = Query()
+        query.fromm.append(MockIndex('test'))
+        query.group_by.append(Column(Integer, 'number'))
+
+        clone = query.clone()
+        clone.group_by.append(Column(Integer, 'date'))
+        clone.within_group_order_by.append(Column(Integer, 'date'))
+
+        self.assertEqual(query.as_sql(), 'SELECT * FROM test '
+                                         'GROUP BY `number`')
+        self.assertEqual(clone.as_sql(), 'SELECT * FROM test '
+                                         'GROUP BY `number`, `date` '
+                                         'WITHIN GROUP ORDER BY `date` ASC')
+
+
+class SQLCacheTestCase(TestCase):
+
+    def test_lru(self):
+        cache = SQLCache(size=2)
+
+        self.assertEqual(cache.get(1, lambda: 'a'), 'a')
+        self.assertEqual(cache.get(2, lambda: 'b'), 'b')
+        self.assertEqual(cache.get(1, lambda: 'c'), 'a')
+        # 2 is the least recently used
+        self.assertEqual(cache.get(3, lambda: 'd'), 'd')
+        self.assertEqual(cache.get(2, lambda: 'e'), 'e')
+        self.assertEqual(cache.get(1, lambda: 'f'), 'f')
+
+        self.assertEqual(cache.statistics(), {'hits': 1, 'misses': 5,
+                                              'size': 2, 'cached': 2})
+
+
+class QueryMetaTestCase(TestCase):
+
+    def test_parse(self):
+        meta = QueryMeta()
+        meta.update([('total', '20'), ('total_found', '100'), ('time', '0.003'),
+                     ('keyword[0]', 'nice'), ('docs[0]', '99'), ('hits[0]', '120'),
+                     ('keyword[1]', 'text'), ('docs[1]', '100'), ('hits[1]', '100')])
+
+        self.assertEqual(meta.total, 20)
+        self.assertEqual(meta.total_found, 100)
+        self.assertEqual(meta.time, 0.003)
+        self.assertEqual(meta.keywords, [('nice', 99, 120), ('text', 100, 100)])
+
+
+class OptionStatementTestCase(TestCase):
+
+    def test_basic(self):
+        option = OptionStatement()
+
+        option.append('ranker', 'none')
+        option.append('max_matches', 100)
+        option.append('field_weights', OrderedDict([('text', 10), ('summary', 1)]))
+
+        self.assertEqual(option.sql(), 'ranker=none, max_matches=100, '
+                                       'field_weights=(text=10, summary=1)')
+
+    def test_override(self):
+        option = OptionStatement()
+
+        option.append('cutoff', 100)
+        option.append('cutoff', 10)
+
+        self.assertEqual(option.sql(), 'cutoff=10')
+
+    def test_invalid_name(self):
+        with self.assertRaises(NotSupportedError):
+            OptionStatement().append('rankerERROR', 'none')
+
+    def test_invalid_values(self):
+        option = OptionStatement()
+
+        self.assertRaises(ValueError, option.append, 'ranker', 'bm26')
+        self.assertRaises(TypeError, option.append, 'max_matches', '100')
+        self.assertRaises(TypeError, option.append, 'max_matches', True)
+        self.assertRaises(ValueError, option.append, 'max_matches', 0)
+        self.assertRaises(ValueError, option.append, 'max_query_time', -1)
+        self.assertRaises(TypeError, option.append, 'field_weights', [('text', 1)])
+        self.assertRaises(ValueError, option.append, 'field_weights', {'te xt': 1})
+        self.assertEqual(len(option), 0)
@@ -1,6 +1,7 @@
 import datetime
 from unittest import TestCase
 
+from sphinxql.core.base import converters
 from sphinxql.types import Date, DateTime, Float, String
 
 
@@ -45,21 +46,21 @@ class ConversionsTestCase(TestCase):
 
         time = datetime.datetime(2014, 2, 2, 12, 12, 12)
 
-        db_value = int(DateTime(time).as_sql())
+        db_value = DateTime(time).get_params()[0]
         self.assertEqual(DateTime.to_python(db_value), time)
 
     def test_dates(self):
 
         date = datetime.date(2014, 2, 2)
 
-        db_value = int(Date(date).as_sql())
+        db_value = Date(date).get_params()[0]
         self.assertEqual(Date.to_python(db_value), date)
 
     def test_float(self):
 
         f = 3.2
 
-        db_value = float(Float(f).as_sql())
+        db_value = float(Float(f).get_params()[0])
         self.assertEqual(Float.to_python(db_value), f)
 
     def test_string(self):
@@ -68,3 +69,8 @@ class ConversionsTestCase(TestCase):
 
         db_value = String(string).as_sql() % String(string).get_params()[0]
         self.assertEqual(Float.to_python(db_value), string)
+
+    def test_converters(self):
+        self.assertEqual(converters([String, Date, Float, DateTime]),
+                         ((1, Date.to_python), (3, DateTime.to_python)))
+        self.assertEqual(converters([String, Float]), ())